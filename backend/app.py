@@ -4,11 +4,20 @@ from flask_cors import CORS
 from dotenv import load_dotenv
 import os
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from werkzeug.security import generate_password_hash, check_password_hash
-from flask import Blueprint, render_template, session, redirect, url_for, send_from_directory, jsonify, request
+from flask import Blueprint, render_template, session, redirect, url_for, jsonify, request
 from bson.objectid import ObjectId
-import subprocess
-import shutil
+from pymongo.errors import DuplicateKeyError, PyMongoError
+import atexit
+import math
+import re
+from write_buffer import BufferFull, WriteBehindBuffer
+from profile_cache import ProfileCache
+from models import UserRepository
+from passwords import DEFAULT_METHOD, HasherBusy, PasswordHasher
+from build_jobs import BuildManager
+from build_cache import BuildCache
+from build_assets import manifests, send_build_file
+from metrics import MetricsRegistry, MongoCommandListener, counter, gauge, instrument
 
 load_dotenv()
 
@@ -16,13 +25,86 @@ app = Flask(__name__)
 CORS(app)
 app.secret_key = os.getenv("SECRET_KEY")
 app.config["MONGO_URI"] = os.getenv("MONGO_URI")
+app.config["WRITE_BEHIND"] = os.getenv("WRITE_BEHIND", "0") == "1"
+# Idle earnings are credited for at most OFFLINE_MAX_SECONDS, and only for gaps longer than OFFLINE_MIN_GAP
+app.config["OFFLINE_MAX_SECONDS"] = float(os.getenv("OFFLINE_MAX_SECONDS", str(8 * 3600)))
+app.config["OFFLINE_MIN_GAP"] = float(os.getenv("OFFLINE_MIN_GAP", "120"))
+
+# Per-worker; gunicorn_config sets METRICS_DIR so /metrics can add up every worker
+metrics = MetricsRegistry(
+    directory=os.getenv("METRICS_DIR"),
+    dump_interval=float(os.getenv("METRICS_DUMP_INTERVAL", "5")),
+)
 
 mongo = PyMongo()
 
 def get_mongo():
     return mongo
 
-mongo.init_app(app)
+mongo.init_app(app, event_listeners=[MongoCommandListener(metrics)])
+
+profile_cache = ProfileCache(
+    max_entries=int(os.getenv("PROFILE_CACHE_SIZE", "5000")),
+    ttl=float(os.getenv("PROFILE_CACHE_TTL", "10")),
+)
+
+users = UserRepository(lambda: mongo.db.users, cache=profile_cache)
+
+# Started per worker by gunicorn_config.post_worker_init when WRITE_BEHIND=1
+progress_buffer = WriteBehindBuffer(
+    lambda: users,
+    on_flush=lambda user_ids: [users.invalidate(user_id) for user_id in user_ids],
+    max_users=int(os.getenv("WRITE_BEHIND_MAX_USERS", "10000")),
+    flush_threshold=int(os.getenv("WRITE_BEHIND_FLUSH_THRESHOLD", "500")),
+    flush_interval=float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "2.0")),
+    max_offline=app.config["OFFLINE_MAX_SECONDS"],
+    min_gap=app.config["OFFLINE_MIN_GAP"],
+)
+
+hasher = PasswordHasher(
+    method=os.getenv("PASSWORD_HASH_METHOD", DEFAULT_METHOD),
+    max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", "2")),
+    max_queue=int(os.getenv("PASSWORD_HASH_QUEUE", "1")),
+    request_threads=int(os.getenv("GUNICORN_THREADS", "4")),
+)
+
+def component_metrics():
+    """Write-behind, users query and password hashing stats for /metrics"""
+    samples = []
+    buffer_stats = progress_buffer.stats()
+    samples.append(gauge("write_buffer_pending_users", "Users with buffered progress", buffer_stats["pending"]))
+    for key in ("flushed_ops", "dropped_ops", "unmatched_ops", "failed_flushes"):
+        samples.append(counter(f"write_buffer_{key}_total", f"Write-behind {key.replace('_', ' ')}", buffer_stats[key]))
+
+    for name, stat in users.stats.snapshot().items():
+        samples.append(counter("users_query_total", "Users collection calls by query", stat["count"], query=name))
+        samples.append(counter("users_query_seconds_total", "Time spent in users collection calls", stat["total_ms"] / 1000, query=name))
+        samples.append(gauge("users_query_max_seconds", "Slowest users collection call", stat["max_ms"] / 1000, agg="max", query=name))
+
+    hash_stats = hasher.stats()
+    samples.append(gauge("password_hash_queue_depth", "Hashes waiting for a worker thread", hash_stats["queue_depth"]))
+    samples.append(gauge("password_hash_running", "Hashes being computed", hash_stats["running"]))
+    samples.append(counter("password_hash_completed_total", "Hashes and verifications completed", hash_stats["completed"]))
+    samples.append(counter("password_hash_rejected_total", "Hashes refused because the queue was full", hash_stats["rejected"]))
+    samples.append(counter("password_hash_seconds_total", "Time spent hashing", hash_stats["avg_ms"] * hash_stats["completed"] / 1000))
+    return samples
+
+metrics.add_collector(component_metrics)
+instrument(app, metrics)
+
+def ensure_indexes():
+    """Create the indexes the routes rely on and fix up stored data. Safe to call on every startup."""
+    try:
+        users.ensure_indexes()
+    except PyMongoError as e:
+        app.logger.error("Could not create users.username index: %s", e)
+    try:
+        fixed = users.migrate_income_rates()
+    except PyMongoError as e:
+        app.logger.error("Could not migrate users.income_rate: %s", e)
+    else:
+        if fixed:
+            app.logger.info("Recomputed income_rate for %d users", fixed)
 
 auth = Blueprint('auth', __name__)
 game = Blueprint('game', __name__)
@@ -34,13 +116,20 @@ def register():
 
     if request.method == 'POST':
         username = request.form['username']
-        password = generate_password_hash(request.form['password'])
+        try:
+            password = hasher.hash(request.form['password'])
+        except HasherBusy:
+            flash("Server is busy, please try again.")
+            return render_template('register.html'), 503
 
-        if mongo.db.users.find_one({"username": username}):
+        # The unique index on users.username turns a concurrent or repeated
+        # sign-up into a DuplicateKeyError, so no lookup is needed first.
+        try:
+            users.create(username, password)
+        except DuplicateKeyError:
             flash("Username already exists.")
             return redirect(url_for('auth.register'))
 
-        mongo.db.users.insert_one({'username': username, 'password': password, 'money': 0, 'birds': []})
         flash("Registered successfully.")
         return redirect(url_for('auth.login'))
 
@@ -52,8 +141,17 @@ def login():
     # mongo = get_mongo()
 
     if request.method == 'POST':
-        user = mongo.db.users.find_one({'username': request.form['username']})
-        if user and check_password_hash(user['password'], request.form['password']):
+        password = request.form['password']
+        user = users.find_for_login(request.form['username'])
+        try:
+            valid = user is not None and hasher.verify(user['password'], password)
+        except HasherBusy:
+            flash("Server is busy, please try again.")
+            return render_template('login.html'), 503
+        if valid:
+            if hasher.needs_rehash(user['password']):
+                # Upgrade hashes made with old parameters without delaying the login.
+                hasher.rehash_later(password, lambda new_hash: users.update_password(user['_id'], new_hash))
             session['user_id'] = str(user['_id'])
             return redirect(url_for('game.dashboard'))
         flash("Invalid credentials.")
@@ -70,24 +168,108 @@ GAME_DIR = os.path.join(CURRENT_DIR, "bird_game")
 BUILD_DIR = os.path.join(GAME_DIR, "build")
 WEB_DIR = os.path.join(BUILD_DIR, "web")
 
+build_cache = BuildCache(GAME_DIR, BUILD_DIR, WEB_DIR)
+manifests.refresh(WEB_DIR)
+
 @game.route('/dashboard')
 def dashboard():
     if 'user_id' not in session:
         return redirect(url_for('auth.login'))
-    # from app import get_mongo
-    # mongo = get_mongo()
-    user = mongo.db.users.find_one({"_id": ObjectId(session['user_id'])})
-    return render_template('dashboard.html', money=user.get('money', 0))
+    user = users.get_dashboard(session['user_id'])
+    if user is None:
+        session.clear()
+        return redirect(url_for('auth.login'))
+    return render_template('dashboard.html', money=user.get('money', 0), build_id=manifests.get(WEB_DIR).build_id)
 
 @game.route('/birds')
 def birds():
     if 'user_id' not in session:
         return redirect(url_for('auth.login'))
-    # from app import get_mongo
-    # mongo = get_mongo()
-    user = mongo.db.users.find_one({"_id": ObjectId(session['user_id'])})
+    user = users.get_collection_page(session['user_id'])
+    if user is None:
+        session.clear()
+        return redirect(url_for('auth.login'))
     return render_template('birds.html', birds=user.get('birds', []))
 
+MAX_SYNC_EVENTS = 500
+# The best bird in the game (legendary) earns 1 gold/sec, listed as 60 gold_per_minute
+MAX_BIRD_GOLD_PER_MINUTE = 60
+SYNC_SESSION_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")  # becomes part of a field name: no '.' or '$'
+
+def parse_progress_events(events):
+    """Fold a batch of sync events into a total gold delta and a list of new birds."""
+    if not isinstance(events, list) or len(events) > MAX_SYNC_EVENTS:
+        raise ValueError(f"events must be a list of at most {MAX_SYNC_EVENTS} items")
+
+    gold = 0
+    birds = []
+    for event in events:
+        if not isinstance(event, dict):
+            raise ValueError("each event must be an object")
+        if event.get('type') == 'gold':
+            amount = event.get('amount')
+            if isinstance(amount, bool) or not isinstance(amount, (int, float)) or not math.isfinite(amount) or amount < 0:
+                raise ValueError("gold events need a finite, non-negative amount")
+            gold += amount
+        elif event.get('type') == 'collect':
+            bird = event.get('bird')
+            if not isinstance(bird, dict) or not isinstance(bird.get('name'), str):
+                raise ValueError("collect events need a bird with a name")
+            rate = bird.get('gold_per_minute', 0)
+            if isinstance(rate, bool) or not isinstance(rate, (int, float)) or not 0 <= rate <= MAX_BIRD_GOLD_PER_MINUTE:
+                raise ValueError(f"gold_per_minute must be between 0 and {MAX_BIRD_GOLD_PER_MINUTE}")
+            birds.append({
+                'name': bird['name'],
+                'rarity': str(bird.get('rarity', 'common')),
+                'gold_per_minute': rate,
+            })
+        else:
+            raise ValueError(f"unknown event type: {event.get('type')!r}")
+
+    return gold, birds
+
+@game.route('/sync-progress', methods=['POST'])
+def sync_progress():
+    if 'user_id' not in session:
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"success": False, "message": "body must be a JSON object"}), 400
+    seq = payload.get('seq')
+    if isinstance(seq, bool) or not isinstance(seq, int) or seq < 1:
+        return jsonify({"success": False, "message": "seq must be a positive integer"}), 400
+    # seq restarts at 1 on every page load, so it is only unique within the client's session
+    sync_session = payload.get('session')
+    if not isinstance(sync_session, str) or not SYNC_SESSION_ID.fullmatch(sync_session):
+        return jsonify({"success": False, "message": "session must be 1-64 letters, digits, '-' or '_'"}), 400
+
+    try:
+        gold, birds = parse_progress_events(payload.get('events', []))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    user_id = ObjectId(session['user_id'])
+    if app.config["WRITE_BEHIND"]:
+        try:
+            accepted = progress_buffer.add(user_id, money=gold, birds=birds, seq=seq, session=sync_session)
+        except BufferFull:
+            # Not queued, so retrying the same batch is safe
+            return jsonify({"success": False, "applied": False, "message": "server busy, retry later",
+                            "session": sync_session, "seq": seq}), 503
+        body = {"success": True, "applied": accepted, "buffered": True, "session": sync_session, "seq": seq}
+    else:
+        # The first batch of a session also credits time away, in the same write
+        credited = users.apply_progress(
+            user_id, sync_session, seq, gold=gold, birds=birds,
+            max_offline=app.config["OFFLINE_MAX_SECONDS"],
+            min_gap=app.config["OFFLINE_MIN_GAP"],
+        )
+        body = {"success": True, "applied": credited is not None, "session": sync_session, "seq": seq}
+        if credited:
+            body["offline_credit"] = credited
+    return jsonify(body)
+
 @game.route('/play')
 def play():
     if 'user_id' not in session:
@@ -99,53 +281,68 @@ def play():
     # print(f"File exists: {os.path.exists(os.path.join(WEB_DIR, 'index.html'))}")
     # print(f"Directory contents: {os.listdir(WEB_DIR) if os.path.exists(WEB_DIR) else 'Directory not found'}")
 
-    return send_from_directory(WEB_DIR, 'index.html')
+    response = send_build_file(WEB_DIR, 'index.html')
+    if response is None:
+        return "Game has not been built yet", 404
+    return response
 
 @game.route('/game-assets/<path:path>')
 def serve_game_assets(path):
     # Serve the asset files from the build directory
-    return send_from_directory(WEB_DIR, path)
+    response = send_build_file(WEB_DIR, path)
+    if response is None:
+        return "File not found", 404
+    return response
 
 @game.route('/<path:filename>')
 def serve_root_files(filename):
-    if os.path.exists(os.path.join(WEB_DIR, filename)):
-        return send_from_directory(WEB_DIR, filename)
-    else:
+    response = send_build_file(WEB_DIR, filename)
+    if response is None:
         return "File not found", 404
+    return response
+
+def build_and_publish(job):
+    message = build_cache.build(job)
+    manifests.refresh(WEB_DIR)
+    return message
+
+build_manager = BuildManager(os.path.join(BUILD_DIR, "jobs"), build_and_publish)
 
 @game.route('/build-game', methods=['POST'])
 def build_game():
     if 'user_id' not in session:
         return jsonify({"success": False, "message": "Not logged in"}), 401
-    
+
     try:
-        # Create the build directory if it doesn't exist
-        os.makedirs(BUILD_DIR, exist_ok=True)
-        
-        # Run the pygbag build command
-        result = subprocess.run(
-            ["pygbag", "--build", GAME_DIR], 
-            capture_output=True, 
-            text=True
-        )
-        
-        if result.returncode != 0:
-            return jsonify({
-                "success": False,
-                "message": f"Build failed: {result.stderr}"
-            }), 500
-            
-        return jsonify({
-            "success": True,
-            "message": "Game built successfully"
-        })
-        
-    except Exception as e:
+        job, created = build_manager.submit()
+    except OSError as e:
         return jsonify({
             "success": False,
             "message": f"Error: {str(e)}"
         }), 500
 
+    return jsonify({
+        "success": True,
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "deduplicated": not created,
+        "status_url": url_for('game.build_status', job_id=job["job_id"]),
+    }), 202
+
+@game.route('/build-game/live')
+def live_build():
+    return jsonify(manifests.get(WEB_DIR).summary())
+
+@game.route('/build-game/<job_id>')
+def build_status(job_id):
+    if 'user_id' not in session:
+        return jsonify({"success": False, "message": "Not logged in"}), 401
+
+    job = build_manager.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": "Unknown build job"}), 404
+    return jsonify(dict(job, success=job["status"] != "failed", build_id=manifests.get(WEB_DIR).build_id))
+
 @app.route('/')
 def home():
     return redirect('/dashboard')
@@ -154,4 +351,8 @@ app.register_blueprint(auth)
 app.register_blueprint(game)
 
 if __name__ == '__main__':
+    ensure_indexes()
+    if app.config["WRITE_BEHIND"]:
+        progress_buffer.start()
+        atexit.register(progress_buffer.stop)
     app.run(host="0.0.0.0", debug=True, port=5001)
@@ -0,0 +1,209 @@
+"""
+Game rules without rendering: gold accrual, spawning, collecting and
+decoration purchases. Nothing here imports pygame, so the economy can be
+tested and fast-forwarded headless (see simulate.py); main.py draws on top.
+"""
+import copy
+
+import numpy as np
+
+# Spawn rolls: once per SPAWN_INTERVAL seconds
+SPAWN_INTERVAL = 1.0
+MAX_SPAWN_CATCH_UP = 120  # rounds replayed after a stall; the spawn points are long full by then
+
+RARITY_TIERS = {
+    "common": {"spawn_chance": 0.10, "gold_per_sec": 0.01},
+    "uncommon": {"spawn_chance": 0.033, "gold_per_sec": 0.05},
+    "rare": {"spawn_chance": 0.0083, "gold_per_sec": 0.10},
+    "epic": {"spawn_chance": 0.0017, "gold_per_sec": 0.20},
+    "legendary": {"spawn_chance": 0.00055, "gold_per_sec": 1.00},
+}
+
+RARITY_ASSIGNMENTS = {
+    "common": ["Duckling"],
+    "uncommon": ["Alien", "Cherry", "Confused", "Crow", "Cyan", "Green", "Gnome"],
+    "rare": ["Dandy", "Eyelash", "Little Guy", "Hamilton", "Blue Parakeet", "Yellow Parakeet",
+            "Onigiri", "Mafia", "Kiwi", "King Rook", "Pirate", "Pitiful", "Pleh", "Purple"],
+    "epic": ["Robin Hood", "Sans Undertale", "Seed Dealer", "Snowy Owl", "Sonic", "Space",
+            "Spiderman", "Stork", "Tomato", "Toucan", "Webslinger", "Zelda"],
+    "legendary": ["Money Mogul"]
+}
+
+DECO_PRICES = {
+    "Bath": 1000,
+    "Clock": 200,
+    "Froggy Fountain": 10000,
+    "Lamp": 100,
+    "Sofa": 500
+}
+
+SPAWN_POINTS = [
+    (50, 135),  # top left
+    (140, 350),  # long left
+    (270, 365),  # long right
+    (240, 210),  # swing
+    (220, 485),  # bottom left
+    (600, 125),  # top right
+    (630, 385)  # bottom right
+]
+
+class Bird:
+    def __init__(self, name, image, gold_per_minute, spawn_chance, rarity):
+        self.name = name
+        self.image = image
+        self.spawn_chance = spawn_chance
+        self.gold_per_minute = gold_per_minute
+        self.rarity = rarity
+
+class SpawnSampler:
+    """
+    Spawn rolls for every bird type, drawn in one batched NumPy call per check.
+    Rounds missed during a long frame stall are replayed rather than dropped.
+    """
+    def __init__(self, bird_types, start, seed=None, interval=SPAWN_INTERVAL, max_catch_up=MAX_SPAWN_CATCH_UP):
+        self.rng = np.random.default_rng(seed)
+        self.interval = interval
+        self.max_catch_up = max_catch_up
+        self.last_check = start
+        self.set_birds(bird_types)
+
+    def set_birds(self, bird_types):
+        self.bird_types = bird_types
+        self.chances = np.array([bird.spawn_chance for bird in bird_types], dtype=float)
+        self.tiers = {}
+        for index, bird in enumerate(bird_types):
+            self.tiers.setdefault(bird.rarity, []).append(index)
+
+    def set_tier_chances(self, chances):
+        """Update only the entries of the given tiers, e.g. {"common": 0.05} after buying the Lamp"""
+        for rarity, chance in chances.items():
+            self.chances[self.tiers.get(rarity, [])] = chance
+
+    def due(self, now):
+        """Number of spawn rounds owed at time now, capped at max_catch_up"""
+        rounds = int((now - self.last_check) // self.interval)
+        if rounds <= 0:
+            return 0
+        self.last_check += rounds * self.interval
+        return min(rounds, self.max_catch_up)
+
+    def sample(self, rounds, free_points):
+        """Birds spawned over `rounds` checks, as (bird, position) pairs filling free_points in random order"""
+        if rounds <= 0 or not free_points or not len(self.chances):
+            return []
+        hits = self.rng.random((rounds, len(self.chances))) < self.chances
+        points = [free_points[i] for i in self.rng.permutation(len(free_points))]
+        spawns = []
+        # argwhere is round-major, so earlier rounds and earlier birds claim points first
+        for _, index in np.argwhere(hits):
+            if not points:
+                break
+            spawns.append((self.bird_types[index], points.pop()))
+        return spawns
+
+# Spawn chance each decoration sets for a rarity tier once it has been bought
+DECORATION_EFFECTS = {
+    "Lamp": {"common": 0.05},
+    "Bath": {"epic": 0.005},
+    "Clock": {"uncommon": 0.04},
+    "Froggy Fountain": {"legendary": 0.05},
+    "Sofa": {"rare": 0.033},
+}
+
+def apply_decoration(name, rarity_tiers, bird_types):
+    """Apply a purchased decoration's effects; returns {rarity: spawn_chance} for the tiers it changed"""
+    changed = DECORATION_EFFECTS.get(name, {})
+    for rarity, chance in changed.items():
+        rarity_tiers[rarity]["spawn_chance"] = chance
+    for bird in bird_types:
+        if bird.rarity in changed:
+            bird.spawn_chance = changed[bird.rarity]
+    return changed
+
+class Collection:
+    """Caught birds as counts per species, with their combined income kept up to date on each catch"""
+    def __init__(self):
+        self.counts = {}
+        self.income_per_minute = 0
+
+    def add(self, bird):
+        self.counts[bird.name] = self.counts.get(bird.name, 0) + 1
+        self.income_per_minute += bird.gold_per_minute
+
+    @property
+    def species(self):
+        """Live set-like view of the species caught so far"""
+        return self.counts.keys()
+
+    def __contains__(self, name):
+        return name in self.counts
+
+    def __len__(self):
+        return sum(self.counts.values())
+
+def make_bird_types(rarity_tiers=RARITY_TIERS, images=None):
+    """One Bird per assigned name, in tier order; with images, only names that have one"""
+    bird_types = []
+    for rarity, names in RARITY_ASSIGNMENTS.items():
+        for name in names:
+            if images is None or name in images:
+                bird_types.append(Bird(
+                    name,
+                    images[name] if images is not None else None,
+                    rarity_tiers[rarity]["gold_per_sec"] * 60,
+                    rarity_tiers[rarity]["spawn_chance"],
+                    rarity
+                ))
+    return bird_types
+
+class GameState:
+    """
+    One player's session. Time only moves through tick(dt), so a caller can
+    run it from the frame clock or fast-forward it in big steps.
+    """
+    def __init__(self, bird_types=None, seed=None, gold=0, start=0.0,
+                 deco_prices=DECO_PRICES, spawn_points=SPAWN_POINTS):
+        self.rarity_tiers = copy.deepcopy(RARITY_TIERS)
+        self.bird_types = bird_types if bird_types is not None else make_bird_types(self.rarity_tiers)
+        self.deco_prices = deco_prices
+        self.spawn_points = list(spawn_points)
+        self.now = start
+        self.gold = gold
+        self.collection = Collection()
+        self.perched = {}
+        self.purchased = set()
+        self.spawner = SpawnSampler(self.bird_types, start=start, seed=seed)
+
+    def free_points(self):
+        return [pos for pos in self.spawn_points if pos not in self.perched]
+
+    def tick(self, dt):
+        """Advance dt seconds: pay out income and run the spawn rolls owed. Returns the new (bird, position) spawns."""
+        self.now += dt
+        # Same payout the game has always used: the per-minute rate, credited per second.
+        # The backend's income_rate (models.income_rate_delta) credits time away at this rate too.
+        self.gold += self.collection.income_per_minute * dt
+        rounds = self.spawner.due(self.now)
+        if not rounds:
+            return []
+        spawns = self.spawner.sample(rounds, self.free_points())
+        for bird, pos in spawns:
+            self.perched[pos] = bird
+        return spawns
+
+    def collect(self, spawn_point):
+        """Catch the bird on spawn_point; returns it, or None if the point was empty"""
+        bird = self.perched.pop(spawn_point, None)
+        if bird is not None:
+            self.collection.add(bird)
+        return bird
+
+    def purchase(self, deco):
+        """Buy a decoration if it is for sale, not owned yet and affordable; returns True if bought"""
+        price = self.deco_prices.get(deco)
+        if price is None or deco in self.purchased or self.gold < price:
+            return False
+        self.gold -= price
+        self.purchased.add(deco)
+        self.spawner.set_tier_chances(apply_decoration(deco, self.rarity_tiers, self.bird_types))
+        return True
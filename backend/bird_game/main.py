@@ -6,14 +6,58 @@ import numpy as np
 from datetime import datetime
 import asyncio
 import traceback
+from collections import OrderedDict
 from pygame import mixer 
 
+try:
+    from .engine import Bird, GameState, make_bird_types
+except ImportError:  # run as a script, as pygbag does
+    from engine import Bird, GameState, make_bird_types
+
 # Constants for game screen
 SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
 
+# Frame pacing: full rate while the player is active, a low rate once the scene is idle
+ACTIVE_FPS = 30
+IDLE_FPS = 4
+IDLE_AFTER = 5.0  # seconds without input, spawn or collect before dropping to IDLE_FPS
+
+# Set for reproducible spawns
+SPAWN_SEED = None
+
 # Paths need to be relative for web deployment
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+class TextCache:
+    """Rendered text surfaces keyed by (font, text, colour, antialias), least recently used evicted first"""
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, colour, antialias=True):
+        key = (font, text, tuple(colour), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, colour)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+text_cache = TextCache()
+
+def render_text(font, text, colour, antialias=True):
+    return text_cache.render(font, text, colour, antialias)
+
 # Error handling and display
 error_messages = []
 MAX_ERROR_MESSAGES = 3
@@ -28,19 +72,24 @@ def add_error_message(error_text):
 def remove_error_message():
     error_messages.clear()
 
-def draw_error_messages(screen, font):
-    """Draw error messages on the screen"""
+def render_error_overlay(font):
+    """Error messages composed onto one translucent banner, or None if there are none"""
     if not error_messages:
-        return
-    
-    error_surface = pygame.Surface((SCREEN_WIDTH, len(error_messages) * 30 + 20))
-    error_surface.set_alpha(200)
-    error_surface.fill((50, 0, 0))
-    screen.blit(error_surface, (0, 0))
-    
+        return None
+
+    error_surface = pygame.Surface((SCREEN_WIDTH, len(error_messages) * 30 + 20), pygame.SRCALPHA)
+    error_surface.fill((50, 0, 0, 200))
+
     for i, msg in enumerate(error_messages):
-        text = font.render(msg, True, (255, 200, 200))
-        screen.blit(text, (10, 10 + i * 30))
+        text = render_text(font, msg, (255, 200, 200))
+        error_surface.blit(text, (10, 10 + i * 30))
+    return error_surface
+
+def draw_error_messages(screen, font):
+    """Draw error messages on the screen"""
+    overlay = render_error_overlay(font)
+    if overlay is not None:
+        screen.blit(overlay, (0, 0))
 
 def load_scaled_image(path, target_width):
     try:
@@ -65,56 +114,327 @@ def greyscale_surface(surface):
     except Exception as e:
         return surface  # Return original surface if conversion fails
 
-class Bird:
-    def __init__(self, name, image, gold_per_minute, spawn_chance, rarity):
-        self.name = name
-        self.image = image
-        self.spawn_chance = spawn_chance
-        self.gold_per_minute = gold_per_minute
-        self.rarity = rarity
+class GreyscaleCache:
+    """Greyscale variants of loaded sprites, keyed by asset path and size"""
+    def __init__(self):
+        self.entries = {}
+        self.by_surface = {}
+
+    def store(self, path, surface):
+        """Compute the greyscale variant of a freshly loaded sprite, replacing any older load of path"""
+        self.evict(path)
+        key = (path, surface.get_size())
+        self.entries[key] = (surface, greyscale_surface(surface))
+        self.by_surface[id(surface)] = key
+        return surface
+
+    def get(self, surface):
+        """Greyscale variant of surface; sprites that were not loaded through store are converted once"""
+        key = self.by_surface.get(id(surface))
+        entry = self.entries.get(key)
+        if entry is None or entry[0] is not surface:
+            key = (None, id(surface))
+            entry = (surface, greyscale_surface(surface))
+            self.entries[key] = entry
+            self.by_surface[id(surface)] = key
+        return entry[1]
+
+    def evict(self, path):
+        for key in [key for key in self.entries if key[0] == path]:
+            surface, _ = self.entries.pop(key)
+            self.by_surface.pop(id(surface), None)
+
+    def clear(self):
+        self.entries.clear()
+        self.by_surface.clear()
+
+greyscale_cache = GreyscaleCache()
+
+def load_sprite(path, target_width):
+    """load_scaled_image plus a precomputed greyscale variant for the Birdiary and Deco Store"""
+    return greyscale_cache.store(path, load_scaled_image(path, target_width))
+
+THUMBNAIL_SIZE = (50, 50)
+ATLAS_COLUMNS = 16
+
+class ThumbnailAtlas:
+    """Colour and greyscale list thumbnails baked into one surface, with a name -> rect index"""
+    def __init__(self, images, size=THUMBNAIL_SIZE, columns=ATLAS_COLUMNS):
+        self.size = size
+        self.rects = {}
+        cells = len(images) * 2
+        columns = max(1, min(columns, cells))
+        rows = max(1, -(-cells // columns))
+        self.surface = pygame.Surface((columns * size[0], rows * size[1]), pygame.SRCALPHA)
+
+        for i, (name, image) in enumerate(images.items()):
+            colour_rect = self._cell(i * 2, columns)
+            grey_rect = self._cell(i * 2 + 1, columns)
+            self.surface.blit(pygame.transform.scale(image, size), colour_rect)
+            self.surface.blit(pygame.transform.scale(greyscale_cache.get(image), size), grey_rect)
+            self.rects[name] = (colour_rect, grey_rect)
+
+    def _cell(self, index, columns):
+        return pygame.Rect((index % columns) * self.size[0], (index // columns) * self.size[1], *self.size)
+
+    def __contains__(self, name):
+        return name in self.rects
+
+    def blit(self, target, name, pos, grey=False):
+        colour_rect, grey_rect = self.rects[name]
+        target.blit(self.surface, pos, grey_rect if grey else colour_rect)
+
+BIRD_LAYER, DECO_LAYER, UI_LAYER, OVERLAY_LAYER = range(4)
+
+class SceneRenderer:
+    """
+    Keeps the forest scene as a set of sprites over the background and pushes
+    only the regions that changed with pygame.display.update. The first frame,
+    and any frame after another screen has drawn over the display, is a full flip.
+    """
+    def __init__(self, screen, background):
+        self.screen = screen
+        self.background = background
+        self.sprites = {}
+        self.dirty = []
+        self.full_redraw = True
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    def set(self, key, surface, pos, layer=BIRD_LAYER):
+        current = self.sprites.get(key)
+        if current is not None and current[1] is surface and current[2] == pos and current[0] == layer:
+            return
+        if current is not None:
+            self.dirty.append(current[1].get_rect(topleft=current[2]))
+        self.sprites[key] = (layer, surface, pos)
+        self.dirty.append(surface.get_rect(topleft=pos))
+
+    def remove(self, key):
+        current = self.sprites.pop(key, None)
+        if current is not None:
+            self.dirty.append(current[1].get_rect(topleft=current[2]))
+
+    def _ordered(self):
+        return sorted(self.sprites.values(), key=lambda sprite: sprite[0])
+
+    def present(self):
+        """Draw and push whatever changed; returns False if nothing had to be presented"""
+        if self.full_redraw:
+            self.screen.blit(self.background, (0, 0))
+            for _, surface, pos in self._ordered():
+                self.screen.blit(surface, pos)
+            pygame.display.flip()
+            self.full_redraw = False
+            self.dirty = []
+            return True
+
+        if not self.dirty:
+            return False
+        screen_rect = self.screen.get_rect()
+        rects = [rect.clip(screen_rect) for rect in self.dirty]
+        rects = [rect for rect in rects if rect.width and rect.height]
+        sprites = self._ordered()
+        for rect in rects:
+            self.screen.set_clip(rect)
+            self.screen.blit(self.background, rect, rect)
+            for _, surface, pos in sprites:
+                if rect.colliderect(surface.get_rect(topleft=pos)):
+                    self.screen.blit(surface, pos)
+        self.screen.set_clip(None)
+        pygame.display.update(rects)
+        self.dirty = []
+        return True
 
-async def show_birdiary(screen, collected_set, bird_types):
+INPUT_EVENTS = (
+    pygame.QUIT, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION,
+    pygame.MOUSEWHEEL, pygame.KEYDOWN, pygame.KEYUP,
+)
+
+class FrameGovernor:
+    """Chooses the main loop's frame rate from how recently anything happened"""
+    def __init__(self, active_fps=ACTIVE_FPS, idle_fps=IDLE_FPS, idle_after=IDLE_AFTER, clock=time.monotonic):
+        self.active_fps = active_fps
+        self.idle_fps = idle_fps
+        self.idle_after = idle_after
+        self.clock = clock
+        self.last_activity = clock()
+
+    def activity(self):
+        """Input, a spawn or a collect: run at full rate again"""
+        self.last_activity = self.clock()
+
+    def idle(self):
+        return self.clock() - self.last_activity >= self.idle_after
+
+    def fps(self):
+        return self.idle_fps if self.idle() else self.active_fps
+
+    async def wait(self, frame_clock):
+        """End the frame: tick at full rate, or sleep out an idle frame but wake on input"""
+        if not self.idle():
+            frame_clock.tick(self.active_fps)
+            await asyncio.sleep(0)
+            return
+
+        deadline = self.clock() + 1 / self.idle_fps
+        while self.clock() < deadline:
+            if pygame.event.peek(INPUT_EVENTS):
+                self.activity()
+                break
+            await asyncio.sleep(max(0, min(1 / self.active_fps, deadline - self.clock())))
+        frame_clock.tick()  # keeps get_time() covering the whole idle frame
+
+def make_button(rect, label, font, colour=(70, 130, 180)):
+    """Pre-rendered rounded button, so the main scene never redraws it"""
+    surface = pygame.Surface(rect.size, pygame.SRCALPHA)
+    pygame.draw.rect(surface, colour, surface.get_rect(), border_radius=8)
+    surface.blit(render_text(font, label, (255, 255, 255)), (10, 6))
+    return surface
+
+class PerchIndex:
+    """
+    Click testing for the birds in GameState.perched, which stays the only
+    record of who sits where. A coarse grid maps screen cells to the spawn
+    points the largest sprite would cover from there, so a click is resolved
+    against one or two candidates with a pixel-accurate pygame.mask test.
+    Sprites must go through prepare() before they spawn.
+    """
+    def __init__(self, spawn_points, perched, cell_size=40):
+        self.spawn_points = list(spawn_points)
+        self.perched = perched
+        self.cell_size = cell_size
+        self.extent = (0, 0)
+        self.grid = {}
+        self.masks = {}
+
+    def mask_for(self, image):
+        mask = self.masks.get(image)
+        if mask is None:
+            mask = self.masks[image] = pygame.mask.from_surface(image)
+            width, height = image.get_size()
+            if width > self.extent[0] or height > self.extent[1]:
+                self.extent = (max(width, self.extent[0]), max(height, self.extent[1]))
+                self._build_grid()
+        return mask
+
+    def prepare(self, images):
+        """Build the masks for every sprite up front instead of on first spawn"""
+        for image in images:
+            self.mask_for(image)
+
+    def _cells(self, rect):
+        size = self.cell_size
+        for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield cx, cy
+
+    def _build_grid(self):
+        self.grid = {}
+        for pos in self.spawn_points:
+            for cell in self._cells(pygame.Rect(pos, self.extent)):
+                self.grid.setdefault(cell, []).append(pos)
+
+    def hit(self, point):
+        """Spawn point of the bird whose opaque pixels are under point, or None"""
+        x, y = point
+        candidates = self.grid.get((x // self.cell_size, y // self.cell_size))
+        if not candidates:
+            return None
+        for pos in reversed(self.perched):  # the most recent spawn is drawn on top
+            if pos not in candidates:
+                continue
+            image = self.perched[pos].image
+            rect = image.get_rect(topleft=pos)
+            if rect.collidepoint(x, y) and self.mask_for(image).get_at((x - rect.x, y - rect.y)):
+                return pos
+        return None
+
+class ScrollingList:
+    """Row layout for the list screens; only rows inside the viewport get drawn"""
+    def __init__(self, count, item_height=60, padding_top=80, scroll_speed=30, viewport_height=SCREEN_HEIGHT):
+        self.count = count
+        self.item_height = item_height
+        self.padding_top = padding_top
+        self.scroll_speed = scroll_speed
+        self.viewport_height = viewport_height
+        self.scroll_offset = 0
+        self.max_scroll = max(0, count * item_height + padding_top - viewport_height + 30)
+
+    def scroll(self, wheel_y):
+        """Apply a mouse wheel movement; returns True if the offset changed"""
+        offset = max(0, min(self.scroll_offset - wheel_y * self.scroll_speed, self.max_scroll))
+        changed = offset != self.scroll_offset
+        self.scroll_offset = offset
+        return changed
+
+    def row_y(self, index):
+        return self.padding_top + index * self.item_height - self.scroll_offset
+
+    def visible_rows(self):
+        first = max(0, (self.scroll_offset - self.padding_top) // self.item_height)
+        last = min(self.count, -(-(self.scroll_offset + self.viewport_height - self.padding_top) // self.item_height))
+        return range(first, max(first, last))
+
+    def row_at(self, pos):
+        """Index of the visible row under pos, or None"""
+        x, y = pos
+        if not 40 <= x < SCREEN_WIDTH - 40:
+            return None
+        index = (y + self.scroll_offset - self.padding_top) // self.item_height
+        if 0 <= index < self.count and 0 <= y < self.viewport_height:
+            return index
+        return None
+
+class ListFonts:
+    """Fonts for the list screens, made once in main() so text_cache keeps hitting across visits"""
+    def __init__(self):
+        self.font = pygame.font.SysFont("Arial", 22)
+        self.big = pygame.font.SysFont("Arial", 28, bold=True)
+        self.error = pygame.font.SysFont("Arial", 18)
+
+async def show_birdiary(screen, collected_set, bird_types, atlas=None, fonts=None):
     try:
+        if atlas is None:
+            atlas = ThumbnailAtlas({bird.name: bird.image for bird in bird_types})
+        if fonts is None:
+            fonts = ListFonts()
         birdiary_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        font = pygame.font.SysFont("Arial", 22)
-        big_font = pygame.font.SysFont("Arial", 28, bold=True)
-        error_font = pygame.font.SysFont("Arial", 18)
-
-        scroll_offset = 0
-        scroll_speed = 30
-        item_height = 60
-        padding_top = 80
+        font, big_font, error_font = fonts.font, fonts.big, fonts.error
 
+        rows = ScrollingList(len(bird_types))
         back_button = pygame.Rect(SCREEN_WIDTH - 120, 20, 100, 30)
-        max_scroll = max(0, len(bird_types) * item_height + padding_top - SCREEN_HEIGHT + 30)
+        drawn_state = None
 
         running = True
         while running:
-            birdiary_surface.fill((245, 245, 220))
-            y = 20 - scroll_offset
+            # Only redraw when something on screen could have changed
+            state = (rows.scroll_offset, len(collected_set), tuple(error_messages))
+            if state != drawn_state:
+                birdiary_surface.fill((245, 245, 220))
 
-            title = big_font.render("Birdiary", True, (50, 50, 50))
-            birdiary_surface.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, y))
-            y += 60
+                title = render_text(big_font, "Birdiary", (50, 50, 50))
+                birdiary_surface.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 20 - rows.scroll_offset))
 
-            for bird in bird_types:
-                img = bird.image if bird.name in collected_set else greyscale_surface(bird.image)
-                img = pygame.transform.scale(img, (50, 50))
-                birdiary_surface.blit(img, (40, y))
-                desc = f"{bird.name}  |  {bird.rarity.title()}  |  {bird.gold_per_minute / 60:.2f} gold/sec"
-                rendered = font.render(desc, True, (30, 30, 30))
-                birdiary_surface.blit(rendered, (100, y + 10))
-                y += item_height
+                for index in rows.visible_rows():
+                    bird = bird_types[index]
+                    y = rows.row_y(index)
+                    atlas.blit(birdiary_surface, bird.name, (40, y), grey=bird.name not in collected_set)
+                    desc = f"{bird.name}  |  {bird.rarity.title()}  |  {bird.gold_per_minute / 60:.2f} gold/sec"
+                    rendered = render_text(font, desc, (30, 30, 30))
+                    birdiary_surface.blit(rendered, (100, y + 10))
 
-            pygame.draw.rect(birdiary_surface, (180, 80, 80), back_button, border_radius=6)
-            back_text = font.render("Back", True, (255, 255, 255))
-            birdiary_surface.blit(back_text, (back_button.x + 24, back_button.y + 2))
+                pygame.draw.rect(birdiary_surface, (180, 80, 80), back_button, border_radius=6)
+                back_text = render_text(font, "Back", (255, 255, 255))
+                birdiary_surface.blit(back_text, (back_button.x + 24, back_button.y + 2))
 
-            screen.blit(birdiary_surface, (0, 0))
+                screen.blit(birdiary_surface, (0, 0))
 
-            draw_error_messages(screen, error_font)
+                draw_error_messages(screen, error_font)
 
-            pygame.display.flip()
+                pygame.display.flip()
+                drawn_state = state
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -123,8 +443,7 @@ async def show_birdiary(screen, collected_set, bird_types):
                     remove_error_message()
                     running = False
                 elif event.type == pygame.MOUSEWHEEL:
-                    scroll_offset -= event.y * scroll_speed
-                    scroll_offset = max(0, min(scroll_offset, max_scroll))
+                    rows.scroll(event.y)
 
             await asyncio.sleep(0)
 
@@ -134,57 +453,53 @@ async def show_birdiary(screen, collected_set, bird_types):
         return True  # Continue game despite error
 
 # Deco Store function
-async def show_store(screen, purchased_set, gold, deco_assets, deco_prices, deco_spawn_points, deco_click_sound):
+async def show_store(screen, purchased_set, gold, deco_assets, deco_prices, deco_spawn_points, deco_click_sound, atlas=None, purchase=None, fonts=None):
     try:
+        if atlas is None:
+            atlas = ThumbnailAtlas(deco_assets)
+        if fonts is None:
+            fonts = ListFonts()
         store_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        font = pygame.font.SysFont("Arial", 22)
-        big_font = pygame.font.SysFont("Arial", 28, bold=True)
-        error_font = pygame.font.SysFont("Arial", 18)
-
-        scroll_offset = 0
-        scroll_speed = 30
-        item_height = 60
-        padding_top = 80
+        font, big_font, error_font = fonts.font, fonts.big, fonts.error
 
+        names = list(deco_assets)
+        rows = ScrollingList(len(names))
         back_button = pygame.Rect(SCREEN_WIDTH - 120, 20, 100, 30)
-        max_scroll = max(0, len(deco_assets) * item_height + padding_top - SCREEN_HEIGHT + 30)
+        drawn_state = None
 
         running = True
         while running:
-            store_surface.fill((245, 245, 220))
-            y = 20 - scroll_offset
-
-            title = big_font.render("Deco Store", True, (50, 50, 50))
-            store_surface.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, y))
-            y += 60
-
-            clickable_items = []
+            # Only redraw when something on screen could have changed
+            state = (rows.scroll_offset, len(purchased_set), int(gold), tuple(error_messages))
+            if state != drawn_state:
+                store_surface.fill((245, 245, 220))
 
-            for name, image in deco_assets.items():
-                img = image if name in purchased_set else greyscale_surface(image)
-                img = pygame.transform.scale(img, (50, 50))
-                store_surface.blit(img, (40, y))
+                title = render_text(big_font, "Deco Store", (50, 50, 50))
+                store_surface.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 20 - rows.scroll_offset))
 
-                status = "Purchased" if name in purchased_set else f"{deco_prices[name]} gold"
-                desc = f"{name}  |  {status}"
-                rendered = font.render(desc, True, (30, 30, 30))
-                store_surface.blit(rendered, (100, y + 10))
+                for index in rows.visible_rows():
+                    name = names[index]
+                    y = rows.row_y(index)
+                    atlas.blit(store_surface, name, (40, y), grey=name not in purchased_set)
 
-                clickable_items.append((pygame.Rect(40, y, SCREEN_WIDTH - 80, item_height), name))
-                y += item_height
+                    status = "Purchased" if name in purchased_set else f"{deco_prices[name]} gold"
+                    desc = f"{name}  |  {status}"
+                    rendered = render_text(font, desc, (30, 30, 30))
+                    store_surface.blit(rendered, (100, y + 10))
 
-            pygame.draw.rect(store_surface, (180, 80, 80), back_button, border_radius=6)
-            back_text = font.render("Back", True, (255, 255, 255))
-            store_surface.blit(back_text, (back_button.x + 24, back_button.y + 2))
+                pygame.draw.rect(store_surface, (180, 80, 80), back_button, border_radius=6)
+                back_text = render_text(font, "Back", (255, 255, 255))
+                store_surface.blit(back_text, (back_button.x + 24, back_button.y + 2))
 
-            gold_text = font.render(f"Gold: {int(gold)}", True, (80, 60, 20))
-            store_surface.blit(gold_text, (20, 20))
+                gold_text = render_text(font, f"Gold: {int(gold)}", (80, 60, 20))
+                store_surface.blit(gold_text, (20, 20))
 
-            screen.blit(store_surface, (0, 0))
+                screen.blit(store_surface, (0, 0))
 
-            draw_error_messages(screen, error_font)
+                draw_error_messages(screen, error_font)
 
-            pygame.display.flip()
+                pygame.display.flip()
+                drawn_state = state
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -194,19 +509,20 @@ async def show_store(screen, purchased_set, gold, deco_assets, deco_prices, deco
                         remove_error_message()
                         running = False
                     else:
-                        for rect, name in clickable_items:
-                            if rect.collidepoint(event.pos) and name not in purchased_set:
-                                price = deco_prices[name]
-                                deco_click_sound.play()
-                                if gold >= price:
-                                    gold -= price
-                                    purchased_set.add(name)
-                                else:
-                                    add_error_message("Not enough gold!")
+                        index = rows.row_at(event.pos)
+                        name = names[index] if index is not None else None
+                        if name is not None and name not in purchased_set:
+                            price = deco_prices[name]
+                            deco_click_sound.play()
+                            # purchase, when given, lets the game state apply the decoration's effects
+                            if gold >= price and (purchase is None or purchase(name)):
+                                gold -= price
+                                purchased_set.add(name)
+                            else:
+                                add_error_message("Not enough gold!")
                 elif event.type == pygame.MOUSEWHEEL:
-                    scroll_offset -= event.y * scroll_speed
-                    scroll_offset = max(0, min(scroll_offset, max_scroll))
-                    
+                    rows.scroll(event.y)
+
             await asyncio.sleep(0)
 
         return True, gold
@@ -234,7 +550,8 @@ async def main():
         target_bird_width = SCREEN_WIDTH // 10
         target_deco_width = SCREEN_WIDTH // 8
         
-        error_font = pygame.font.SysFont("Arial", 18)
+        list_fonts = ListFonts()
+        error_font = list_fonts.error
         
         bg_path = os.path.join(BASE_DIR, "assets/backgrounds/forest.png")
         bg = load_scaled_image(bg_path, SCREEN_WIDTH)
@@ -290,68 +607,17 @@ async def main():
         bird_assets = {}
         for name, file in bird_images.items():
             bird_path = os.path.join(BASE_DIR, f"assets/birds/{file}")
-            bird_assets[name] = load_scaled_image(bird_path, target_bird_width)
+            bird_assets[name] = load_sprite(bird_path, target_bird_width)
         
         deco_assets = {}
         for name, file in deco_images.items():
             deco_path = os.path.join(BASE_DIR, f"assets/decoration/{file}")
-            deco_assets[name] = load_scaled_image(deco_path, target_deco_width)
+            deco_assets[name] = load_sprite(deco_path, target_deco_width)
         
-        deco_prices = {
-            "Bath": 1000,
-            "Clock": 200,
-            "Froggy Fountain": 10000,
-            "Lamp": 100,
-            "Sofa": 500
-        }
+        # Birds and decorations have distinct names, so one atlas serves both list screens
+        thumbnails = ThumbnailAtlas({**bird_assets, **deco_assets})
 
-        # deco_prices = {
-        #     "Bath": 0,
-        #     "Clock": 0,
-        #     "Froggy Fountain": 0,
-        #     "Lamp": 0,
-        #     "Sofa": 0
-        # }
-        
-        rarity_tiers = {
-            "common": {"spawn_chance": 0.10, "gold_per_sec": 0.01},
-            "uncommon": {"spawn_chance": 0.033, "gold_per_sec": 0.05},
-            "rare": {"spawn_chance": 0.0083, "gold_per_sec": 0.10},
-            "epic": {"spawn_chance": 0.0017, "gold_per_sec": 0.20},
-            "legendary": {"spawn_chance": 0.00055, "gold_per_sec": 1.00},
-        }
-        
-        rarity_assignments = {
-            "common": ["Duckling"],
-            "uncommon": ["Alien", "Cherry", "Confused", "Crow", "Cyan", "Green", "Gnome"],
-            "rare": ["Dandy", "Eyelash", "Little Guy", "Hamilton", "Blue Parakeet", "Yellow Parakeet",
-                    "Onigiri", "Mafia", "Kiwi", "King Rook", "Pirate", "Pitiful", "Pleh", "Purple"],
-            "epic": ["Robin Hood", "Sans Undertale", "Seed Dealer", "Snowy Owl", "Sonic", "Space",
-                    "Spiderman", "Stork", "Tomato", "Toucan", "Webslinger", "Zelda"],
-            "legendary": ["Money Mogul"]
-        }
-        
-        bird_types = []
-        for rarity, names in rarity_assignments.items():
-            for name in names:
-                if name in bird_assets:
-                    bird_types.append(Bird(
-                        name,
-                        bird_assets[name],
-                        rarity_tiers[rarity]["gold_per_sec"] * 60,
-                        rarity_tiers[rarity]["spawn_chance"],
-                        rarity
-                    ))
-        
-        SPAWN_POINTS = [
-            (50, 135),  # top left
-            (140, 350),  # long left
-            (270, 365),  # long right
-            (240, 210),  # swing
-            (220, 485),  # bottom left
-            (600, 125),  # top right
-            (630, 385)  # bottom right
-        ]
+        bird_types = make_bird_types(images=bird_assets)
         
         DECO_SPAWN_POINTS = {
             "Lamp": (50, 320),
@@ -361,201 +627,99 @@ async def main():
             "Sofa": (700, 135)  
         }
         
-        spawned_birds = []
-        collected_birds = []
-        purchased_deco = set()
-        gold = 0
-        last_spawn_check = time.time()
-        occupied_spawn = set()
-        lamp = False
-        bath = False
-        clock = False
-        fountain = False
-        sofa = False
+        state = GameState(bird_types, seed=SPAWN_SEED)
+        perches = PerchIndex(state.spawn_points, state.perched)
+        perches.prepare(bird_assets.values())
+        shown_deco = set()
         
         FONT = pygame.font.SysFont("Arial", 24)
         BUTTON_FONT = pygame.font.SysFont("Arial", 20)
         birdiary_button = pygame.Rect(SCREEN_WIDTH - 180, 10, 160, 35)
         store_button = pygame.Rect(SCREEN_WIDTH - 180, 60, 160, 35)
         
+        scene = SceneRenderer(screen, bg)
+        scene.set("birdiary_button", make_button(birdiary_button, "Open Birdiary", BUTTON_FONT), birdiary_button.topleft, layer=UI_LAYER)
+        scene.set("store_button", make_button(store_button, "Store", BUTTON_FONT), store_button.topleft, layer=UI_LAYER)
+        shown_errors = ()
+        
         clock = pygame.time.Clock()
+        governor = FrameGovernor()
         running = True
         
         while running:
             try:
-                screen.blit(bg, (0, 0))
-                now = time.time()
                 delta_time = clock.get_time() / 1000
                 
-                gold += sum(b.gold_per_minute for b in collected_birds) * delta_time 
-                
-                if now - last_spawn_check >= 1:
-                    unoccupied_spawn = [spawn for spawn in SPAWN_POINTS if spawn not in occupied_spawn]
-                    random.shuffle(unoccupied_spawn)
-                    
-                    for bird in bird_types:
-                        if random.random() < bird.spawn_chance and unoccupied_spawn:
-                            spawn_position = unoccupied_spawn.pop()
-                            occupied_spawn.add(spawn_position)
-                            spawned_birds.append({"bird": bird, "pos": spawn_position})
-                    last_spawn_check = now
-                
-                for obj in spawned_birds:
-                    screen.blit(obj["bird"].image, obj["pos"])
-                
-                for deco in purchased_deco:
-                    if deco in deco_assets and deco in DECO_SPAWN_POINTS:
-                        if not lamp and deco == "Lamp":
-                            rarity_tiers["common"]["spawn_chance"] = 0.05
-                            print("altered rarity")
-                            bird_types = []
-                            for rarity, names in rarity_assignments.items():
-                                for name in names:
-                                    if name in bird_assets:
-                                        bird_types.append(Bird(
-                                            name,
-                                            bird_assets[name],
-                                            rarity_tiers[rarity]["gold_per_sec"] * 60,
-                                            rarity_tiers[rarity]["spawn_chance"],
-                                            rarity
-                                        ))
-                            lamp = True
-                        elif not bath and deco == "Bath":
-                            rarity_tiers["epic"]["spawn_chance"] = 0.005
-                            print("altered rarity")
-                            bird_types = []
-                            for rarity, names in rarity_assignments.items():
-                                for name in names:
-                                    if name in bird_assets:
-                                        bird_types.append(Bird(
-                                            name,
-                                            bird_assets[name],
-                                            rarity_tiers[rarity]["gold_per_sec"] * 60,
-                                            rarity_tiers[rarity]["spawn_chance"],
-                                            rarity
-                                        ))
-                            bath = True
-                        elif not clock and deco == "Clock":
-                            rarity_tiers["uncommon"]["spawn_chance"] = 0.04
-                            print("altered rarity")
-                            bird_types = []
-                            for rarity, names in rarity_assignments.items():
-                                for name in names:
-                                    if name in bird_assets:
-                                        bird_types.append(Bird(
-                                            name,
-                                            bird_assets[name],
-                                            rarity_tiers[rarity]["gold_per_sec"] * 60,
-                                            rarity_tiers[rarity]["spawn_chance"],
-                                            rarity
-                                        ))
-                            clock = True
-                        elif not fountain and deco == "Froggy Fountain":
-                            rarity_tiers["legendary"]["spawn_chance"] =  0.05
-                            print("altered rarity")
-                            print(rarity_tiers["legendary"]["spawn_chance"])
-                            bird_types = []
-                            for rarity, names in rarity_assignments.items():
-                                for name in names:
-                                    if name in bird_assets:
-                                        bird_types.append(Bird(
-                                            name,
-                                            bird_assets[name],
-                                            rarity_tiers[rarity]["gold_per_sec"] * 60,
-                                            rarity_tiers[rarity]["spawn_chance"],
-                                            rarity
-                                        ))
-                            fountain = True
-                        elif not sofa and deco == "Sofa":
-                            rarity_tiers["rare"]["spawn_chance"] = 0.033
-                            print("altered rarity")
-                            bird_types = []
-                            for rarity, names in rarity_assignments.items():
-                                for name in names:
-                                    if name in bird_assets:
-                                        bird_types.append(Bird(
-                                            name,
-                                            bird_assets[name],
-                                            rarity_tiers[rarity]["gold_per_sec"] * 60,
-                                            rarity_tiers[rarity]["spawn_chance"],
-                                            rarity
-                                        ))
-                            sofa = True
-
-                        # rarity_tiers = {
-                        #    "common": {"spawn_chance": 0.10, "gold_per_sec": 0.01},
-                        #    "uncommon": {"spawn_chance": 0.033, "gold_per_sec": 0.05},
-                        #    "rare": {"spawn_chance": 0.0083, "gold_per_sec": 0.10},
-                        #    "epic": {"spawn_chance": 0.0017, "gold_per_sec": 0.20},
-                        #    "legendary": {"spawn_chance": 0.00055, "gold_per_sec": 1.00},
-                        # }
-                        screen.blit(deco_assets[deco], DECO_SPAWN_POINTS[deco])
+                for bird, spawn_position in state.tick(delta_time):
+                    scene.set(("bird", spawn_position), bird.image, spawn_position)
+                    governor.activity()
                 
-                gold_text = FONT.render(f"Gold: {int(gold)}", True, (255, 255, 0))
-                screen.blit(gold_text, (10, 10))
+                gold_text = render_text(FONT, f"Gold: {int(state.gold)}", (255, 255, 0))
+                scene.set("gold", gold_text, (10, 10), layer=UI_LAYER)
                 
-                pygame.draw.rect(screen, (70, 130, 180), birdiary_button, border_radius=8)
-                pygame.draw.rect(screen, (70, 130, 180), store_button, border_radius=8)
-                
-                button_text = BUTTON_FONT.render("Open Birdiary", True, (255, 255, 255))
-                store_text = BUTTON_FONT.render("Store", True, (255, 255, 255))
-                
-                screen.blit(button_text, (birdiary_button.x + 10, birdiary_button.y + 6))
-                screen.blit(store_text, (store_button.x + 10, store_button.y + 6))
-                
-                draw_error_messages(screen, error_font)
+                if tuple(error_messages) != shown_errors:
+                    shown_errors = tuple(error_messages)
+                    overlay = render_error_overlay(error_font)
+                    if overlay is None:
+                        scene.remove("errors")
+                    else:
+                        scene.set("errors", overlay, (0, 0), layer=OVERLAY_LAYER)
                 
-                pygame.display.flip()
+                scene.present()
                 
                 for event in pygame.event.get():
+                    if event.type in INPUT_EVENTS:
+                        governor.activity()
                     if event.type == pygame.QUIT:
                         running = False
                     elif event.type == pygame.MOUSEBUTTONDOWN:
                         if birdiary_button.collidepoint(event.pos):
-                            collected_set = set(b.name for b in collected_birds)
                             button_click_sound.play()
-                            game_status = await show_birdiary(screen, collected_set, bird_types)
+                            game_status = await show_birdiary(screen, state.collection.species, bird_types, atlas=thumbnails, fonts=list_fonts)
+                            scene.invalidate()
+                            governor.activity()
                             button_click_sound.play()
                             running = game_status
                         elif store_button.collidepoint(event.pos):
                             button_click_sound.play()
-                            game_status, gold = await show_store(screen, purchased_deco, gold, deco_assets, deco_prices, DECO_SPAWN_POINTS, deco_click_sound)
+                            game_status, _ = await show_store(screen, state.purchased, state.gold, deco_assets, state.deco_prices, DECO_SPAWN_POINTS, deco_click_sound, atlas=thumbnails, purchase=state.purchase, fonts=list_fonts)
+                            for deco in state.purchased - shown_deco:
+                                if deco in deco_assets and deco in DECO_SPAWN_POINTS:
+                                    scene.set(("deco", deco), deco_assets[deco], DECO_SPAWN_POINTS[deco], layer=DECO_LAYER)
+                                shown_deco.add(deco)
+                            scene.invalidate()
+                            governor.activity()
                             button_click_sound.play()
                             running = game_status
                         else:
-                            mx, my = event.pos
-                            for obj in spawned_birds[:]:
-                                rect = obj["bird"].image.get_rect(topleft=obj["pos"])
-                                if rect.collidepoint(mx, my):
-                                    collected_birds.append(obj["bird"])
-                                    print(obj["bird"].rarity)
-                                    if obj["bird"].rarity == "common":
-                                        print("should play sound!!!!!!!!!!!!!!!!!!!!!!!!!")
-                                        common_click_sound.play() 
-                                    elif obj["bird"].rarity == "uncommon":
-                                        print("should play sound!!!!!!!!!!!!!!!!!!!!!!!!!")
-                                        uncommon_click_sound.play() 
-                                    elif obj["bird"].rarity == "rare":
-                                        print("should play sound!!!!!!!!!!!!!!!!!!!!!!!!!")
-                                        rare_click_sound.play()
-                                    elif obj["bird"].rarity == "epic":
-                                        print("should play sound!!!!!!!!!!!!!!!!!!!!!!!!!")
-                                        epic_click_sound.play()
-                                    elif obj["bird"].rarity == "legendary":
-                                        print("should play sound!!!!!!!!!!!!!!!!!!!!!!!!!")
-                                        legendary_click_sound.play()
-                                    print(f"Collected: {obj['bird'].name} @ {datetime.now()}")
-                                    occupied_spawn.discard(obj["pos"])
-                                    spawned_birds.remove(obj)
-                                    break
+                            hit = perches.hit(event.pos)
+                            if hit is not None:
+                                scene.remove(("bird", hit))
+                                bird = state.collect(hit)
+                                print(bird.rarity)
+                                if bird.rarity == "common":
+                                    print("should play sound!!!!!!!!!!!!!!!!!!!!!!!!!")
+                                    common_click_sound.play() 
+                                elif bird.rarity == "uncommon":
+                                    print("should play sound!!!!!!!!!!!!!!!!!!!!!!!!!")
+                                    uncommon_click_sound.play() 
+                                elif bird.rarity == "rare":
+                                    print("should play sound!!!!!!!!!!!!!!!!!!!!!!!!!")
+                                    rare_click_sound.play()
+                                elif bird.rarity == "epic":
+                                    print("should play sound!!!!!!!!!!!!!!!!!!!!!!!!!")
+                                    epic_click_sound.play()
+                                elif bird.rarity == "legendary":
+                                    print("should play sound!!!!!!!!!!!!!!!!!!!!!!!!!")
+                                    legendary_click_sound.play()
+                                print(f"Collected: {bird.name} @ {datetime.now()}")
             
             except Exception as e:
                 # Main game loop error handling
                 add_error_message(f"Game loop error: {str(e)}")
             
             try:
-                clock.tick(30)
-                await asyncio.sleep(0)
+                await governor.wait(clock)
             except Exception as e:
                 add_error_message(f"Clock error: {str(e)}")
         
@@ -0,0 +1,87 @@
+"""
+Fast-forward a Bird Watching session without a window.
+
+    python simulate.py --hours 24 --seed 1
+    python -m bird_game.simulate --hours 8 --collect-every 60 --json
+
+The simulated player comes back every --collect-every seconds, catches every
+bird that is perched, and buys whatever decorations it can afford, cheapest
+first. Each visit is a single GameState.tick, so a day of game time runs in
+milliseconds.
+"""
+import argparse
+import json
+import time
+
+try:
+    from .engine import GameState
+except ImportError:  # run as a script from the game directory
+    from engine import GameState
+
+
+def simulate(hours, seed=None, collect_every=30.0, buy=True):
+    """Run a session for `hours` of game time; returns the final GameState and the purchases made"""
+    state = GameState(seed=seed)
+    end = hours * 3600
+    purchases = []
+    by_price = sorted(state.deco_prices, key=state.deco_prices.get)
+
+    while state.now < end:
+        state.tick(min(collect_every, end - state.now))
+        for spawn_point in list(state.perched):
+            state.collect(spawn_point)
+        if buy:
+            for deco in by_price:
+                if deco not in state.purchased and state.purchase(deco):
+                    purchases.append({"deco": deco, "at_hours": round(state.now / 3600, 3)})
+    return state, purchases
+
+
+def summarize(state, purchases, elapsed):
+    rarity = {bird.name: bird.rarity for bird in state.bird_types}
+    caught = {}
+    for name, count in state.collection.counts.items():
+        caught[rarity[name]] = caught.get(rarity[name], 0) + count
+    return {
+        "hours": round(state.now / 3600, 3),
+        "gold": round(state.gold, 2),
+        "income_per_minute": round(state.collection.income_per_minute, 4),
+        "birds_caught": len(state.collection),
+        "species_caught": len(state.collection.counts),
+        "caught_by_rarity": caught,
+        "purchases": purchases,
+        "elapsed_ms": round(elapsed * 1000, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fast-forward a Bird Watching session headless")
+    parser.add_argument("--hours", type=float, default=8.0, help="game time to simulate")
+    parser.add_argument("--seed", type=int, default=None, help="spawn seed, for reproducible runs")
+    parser.add_argument("--collect-every", type=float, default=30.0, help="seconds between player visits")
+    parser.add_argument("--no-buy", action="store_true", help="never buy decorations")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+    if args.hours < 0 or args.collect_every <= 0:
+        parser.error("--hours must be >= 0 and --collect-every > 0")
+
+    start = time.perf_counter()
+    state, purchases = simulate(args.hours, seed=args.seed, collect_every=args.collect_every, buy=not args.no_buy)
+    summary = summarize(state, purchases, time.perf_counter() - start)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return summary
+
+    print(f"Simulated {summary['hours']}h in {summary['elapsed_ms']} ms")
+    print(f"Gold: {summary['gold']}  |  income {summary['income_per_minute']} gold/min")
+    print(f"Birds caught: {summary['birds_caught']} ({summary['species_caught']} species)")
+    for rarity, count in summary["caught_by_rarity"].items():
+        print(f"  {rarity}: {count}")
+    for purchase in purchases:
+        print(f"Bought {purchase['deco']} at {purchase['at_hours']}h")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Serving the pygbag web build with validators and precompressed variants.
+
+Each build is precompressed once, right after pygbag finishes, into .gz and
+.br siblings (.br needs Brotli from requirements.txt). Requests get a
+strong ETag derived from the file contents, a 304 when it still matches, and
+the smallest variant the client accepts.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+
+from flask import Response, request, send_file
+
+try:
+    import brotli
+except ImportError:  # an environment without requirements.txt installed still serves .gz
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "application/wasm", "image/svg+xml")
+COMPRESSIBLE_EXTENSIONS = (".apk", ".tar", ".data")
+MIN_COMPRESS_SIZE = 1024
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+def is_compressible(path):
+    mimetype, _ = mimetypes.guess_type(path)
+    return path.endswith(COMPRESSIBLE_EXTENSIONS) or (mimetype or "").startswith(COMPRESSIBLE_TYPES)
+
+
+def precompress(web_dir):
+    """Write .gz/.br variants next to every compressible file that actually shrinks."""
+    for root, _, files in os.walk(web_dir):
+        for name in files:
+            if name.endswith((".gz", ".br")):
+                continue
+            path = os.path.join(root, name)
+            if os.path.getsize(path) < MIN_COMPRESS_SIZE or not is_compressible(path):
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants[".br"] = brotli.compress(data)
+            for suffix, compressed in variants.items():
+                if len(compressed) < len(data) * 0.95:
+                    with open(path + suffix, "wb") as f:
+                        f.write(compressed)
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def live_build_id(web_dir):
+    """Fingerprint of the cached build web_dir points at, or None for a plain directory."""
+    if os.path.islink(web_dir):
+        return os.path.basename(os.readlink(web_dir))
+    return None
+
+
+class ManifestEntry:
+    def __init__(self, path, size, mtime, etag, variants):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.etag = etag
+        self.variants = variants
+
+    def to_dict(self):
+        return {"size": self.size, "mtime": self.mtime, "etag": self.etag, "variants": sorted(self.variants)}
+
+
+class BuildManifest:
+    """Immutable snapshot of a web build: every file's size, mtime, hash and variants."""
+
+    def __init__(self, web_dir, build_id, entries, token):
+        self.web_dir = web_dir
+        self.build_id = build_id
+        self.entries = entries
+        self.token = token
+
+    @classmethod
+    def scan(cls, web_dir):
+        build_id = live_build_id(web_dir)
+        entries = {}
+        root = os.path.realpath(web_dir)
+        for dirpath, _, files in os.walk(root):
+            for name in files:
+                if name.endswith((".gz", ".br")):
+                    continue
+                path = os.path.join(dirpath, name)
+                stat = os.stat(path)
+                variants = {
+                    encoding: suffix
+                    for encoding, suffix in ENCODINGS
+                    if name + suffix in files
+                }
+                relpath = os.path.relpath(path, root).replace(os.sep, "/")
+                entries[relpath] = ManifestEntry(path, stat.st_size, stat.st_mtime, file_hash(path)[:32], variants)
+        return cls(web_dir, build_id, entries, _build_token(web_dir))
+
+    def get(self, filename):
+        return self.entries.get(filename)
+
+    def summary(self):
+        return {
+            "build_id": self.build_id,
+            "files": len(self.entries),
+            "bytes": sum(entry.size for entry in self.entries.values()),
+            "built_at": max((entry.mtime for entry in self.entries.values()), default=None),
+        }
+
+
+def _build_token(web_dir):
+    """Cheap value that changes whenever a different build goes live in web_dir."""
+    try:
+        return live_build_id(web_dir) or os.stat(web_dir).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ManifestStore:
+    """
+    Holds the current manifest per web directory. Other workers may swap in a
+    new build, so the live build is re-checked at most every recheck_interval.
+    """
+
+    def __init__(self, recheck_interval=1.0, clock=time.monotonic):
+        self.recheck_interval = recheck_interval
+        self.clock = clock
+        self._manifests = {}
+        self._lock = threading.Lock()
+
+    def get(self, web_dir):
+        with self._lock:
+            cached = self._manifests.get(web_dir)
+        if cached is not None:
+            manifest, checked_at = cached
+            if self.clock() - checked_at < self.recheck_interval:
+                return manifest
+            if _build_token(web_dir) == manifest.token:
+                with self._lock:
+                    self._manifests[web_dir] = (manifest, self.clock())
+                return manifest
+        return self.refresh(web_dir)
+
+    def refresh(self, web_dir):
+        manifest = BuildManifest.scan(web_dir)
+        with self._lock:
+            self._manifests[web_dir] = (manifest, self.clock())
+        return manifest
+
+
+manifests = ManifestStore()
+
+
+def send_build_file(web_dir, filename):
+    """
+    Send web_dir/filename with an ETag, Accept-Encoding negotiation and cache
+    headers, answering from the in-memory manifest. Returns None if the file
+    is not part of the live build.
+    """
+    manifest = manifests.get(web_dir)
+    entry = manifest.get(filename)
+    if entry is None:
+        return None
+
+    # Only URLs that carry the live build id can be cached forever.
+    versioned = manifest.build_id is not None and request.args.get("v") == manifest.build_id
+    encoding = next((name for name, _ in ENCODINGS if name in entry.variants and request.accept_encodings[name]), None)
+    tag = f"{entry.etag}-{encoding}" if encoding else entry.etag
+
+    if request.if_none_match.contains(tag):
+        response = Response(status=304)
+    else:
+        mimetype = mimetypes.guess_type(entry.path)[0] or "application/octet-stream"
+        path = entry.path + entry.variants[encoding] if encoding else entry.path
+        response = send_file(path, mimetype=mimetype, etag=False, conditional=False, last_modified=entry.mtime)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+    response.set_etag(tag)
+    response.headers["Cache-Control"] = IMMUTABLE if versioned else REVALIDATE
+    if manifest.build_id:
+        response.headers["X-Build-Id"] = manifest.build_id
+    response.vary.add("Accept-Encoding")
+    return response
@@ -0,0 +1,126 @@
+"""
+Content-addressed cache of pygbag web builds.
+
+The game sources and assets are fingerprinted, and each finished build is kept
+under build/cache/<fingerprint>. Rebuilding an unchanged tree just re-activates
+the cached output. New builds run in a staging copy of the game, and the live
+web directory is a symlink that is swapped with os.replace. That way /play
+always sees either the old build or the new one, never a half-written one.
+"""
+
+import hashlib
+import os
+import shutil
+import time
+
+from build_assets import live_build_id, precompress
+from build_jobs import run_command
+
+IGNORED_DIRS = {"build", "__pycache__"}
+
+
+def fingerprint(game_dir):
+    """sha256 over every source and asset file in game_dir, plus the pygbag version."""
+    digest = hashlib.sha256()
+    digest.update(_pygbag_version().encode())
+    for root, dirs, files in os.walk(game_dir):
+        dirs[:] = sorted(d for d in dirs if d not in IGNORED_DIRS)
+        for name in sorted(files):
+            if name.endswith((".pyc", ".pyo")):
+                continue
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, game_dir).replace(os.sep, "/").encode())
+            digest.update(b"\0")
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 16), b""):
+                    digest.update(chunk)
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _pygbag_version():
+    try:
+        from importlib.metadata import version
+        return version("pygbag")
+    except Exception:
+        return "unknown"
+
+
+class BuildCache:
+    def __init__(self, game_dir, build_dir, web_dir, keep=3):
+        self.game_dir = game_dir
+        self.build_dir = build_dir
+        self.web_dir = web_dir
+        self.keep = keep
+        self.cache_dir = os.path.join(build_dir, "cache")
+        self.staging_dir = os.path.join(build_dir, "staging")
+
+    def cached(self, digest):
+        path = os.path.join(self.cache_dir, digest)
+        return path if os.path.isfile(os.path.join(path, "index.html")) else None
+
+    def active(self):
+        """Fingerprint of the build currently served from web_dir, if it came from the cache."""
+        return live_build_id(self.web_dir)
+
+    def build(self, job):
+        """BuildManager work function: reuse a cached build or make a new one, then go live."""
+        digest = fingerprint(self.game_dir)
+        job.log_line(f"source fingerprint {digest[:12]}")
+
+        if self.cached(digest):
+            self.activate(digest)
+            return f"Game unchanged, reused cached build {digest[:12]}"
+
+        staging = os.path.join(self.staging_dir, f"{digest}-{os.getpid()}")
+        app_dir = os.path.join(staging, os.path.basename(self.game_dir))
+        shutil.rmtree(staging, ignore_errors=True)
+        try:
+            shutil.copytree(self.game_dir, app_dir, ignore=shutil.ignore_patterns(*IGNORED_DIRS))
+            run_command([
+                "pygbag", "--build",
+                "--cache", os.path.join(self.build_dir, "web-cache"),
+                app_dir,
+            ])(job)
+            web_output = os.path.join(app_dir, "build", "web")
+            job.log_line("precompressing build output")
+            precompress(web_output)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            os.replace(web_output, os.path.join(self.cache_dir, digest))
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        self.activate(digest)
+        return f"Game built successfully ({digest[:12]})"
+
+    def activate(self, digest):
+        """Atomically point web_dir at the cached build for digest."""
+        target = os.path.join(self.cache_dir, digest)
+        os.utime(target)
+        legacy = None
+        if os.path.isdir(self.web_dir) and not os.path.islink(self.web_dir):
+            # A build from before the cache existed; os.replace cannot overwrite a directory.
+            legacy = f"{self.web_dir}.legacy-{int(time.time())}"
+            os.replace(self.web_dir, legacy)
+
+        tmp_link = f"{self.web_dir}.{os.getpid()}.tmp"
+        if os.path.lexists(tmp_link):
+            os.remove(tmp_link)
+        os.symlink(os.path.relpath(target, os.path.dirname(self.web_dir)), tmp_link)
+        os.replace(tmp_link, self.web_dir)
+        if legacy is not None:
+            shutil.rmtree(legacy, ignore_errors=True)
+        self.prune(keep_digest=digest)
+
+    def prune(self, keep_digest=None):
+        """Drop all but the newest `keep` cached builds, never the live one."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        entries = [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if name != keep_digest
+        ]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for path in entries[max(self.keep - 1, 0):]:
+            shutil.rmtree(path, ignore_errors=True)
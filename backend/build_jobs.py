@@ -0,0 +1,198 @@
+"""
+Background jobs for rebuilding the pygbag web build.
+
+A build runs in a daemon thread so the request that started it returns right
+away. Job state is written to a JSON file under the build directory, which lets
+any gunicorn worker answer a status poll. A lock file makes sure only one build
+runs at a time: submitting while a build is running returns that build instead
+of starting a second one.
+"""
+
+import json
+import os
+import subprocess
+import threading
+import time
+import uuid
+from collections import deque
+
+FINISHED = ("succeeded", "failed")
+
+
+class BuildJob:
+    def __init__(self, manager, job_id=None):
+        self.manager = manager
+        self.id = job_id or uuid.uuid4().hex
+        self.status = "queued"
+        self.message = ""
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.log = deque(maxlen=manager.max_log_lines)
+        self._last_saved = 0.0
+
+    def log_line(self, line):
+        line = line.rstrip()
+        if line:
+            self.log.append(line)
+            if time.time() - self._last_saved >= self.manager.save_interval:
+                self.save()
+
+    def to_dict(self):
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "message": self.message,
+            "progress": self.log[-1] if self.log else "",
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed": round(end - self.started_at, 1) if self.started_at else 0,
+            "log": list(self.log),
+            "pid": os.getpid(),
+        }
+
+    def save(self):
+        self._last_saved = time.time()
+        self.manager.write_state(self.id, self.to_dict())
+
+
+class BuildManager:
+    def __init__(self, state_dir, work, max_log_lines=200, save_interval=1.0, stale_after=30 * 60, keep_jobs=20):
+        self.state_dir = state_dir
+        self.keep_jobs = keep_jobs
+        self.work = work
+        self.max_log_lines = max_log_lines
+        self.save_interval = save_interval
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+
+    @property
+    def lock_path(self):
+        return os.path.join(self.state_dir, "current.lock")
+
+    def submit(self):
+        """Start a build, or join the one already running. Returns (state, created)."""
+        os.makedirs(self.state_dir, exist_ok=True)
+        with self._lock:
+            running = self._running_job()
+            if running is not None:
+                return running, False
+
+            job = BuildJob(self)
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                # Another worker won the race; join its build.
+                running = self._running_job()
+                if running is not None:
+                    return running, False
+                raise
+            with os.fdopen(fd, "w") as f:
+                f.write(job.id)
+
+            self._prune()
+            job.save()
+            threading.Thread(target=self._run, args=(job,), name=f"build-{job.id[:8]}", daemon=True).start()
+            return job.to_dict(), True
+
+    def get(self, job_id):
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(self._state_path(job_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_state(self, job_id, state):
+        path = self._state_path(job_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def _run(self, job):
+        job.status = "running"
+        job.started_at = time.time()
+        job.save()
+        try:
+            job.message = self.work(job) or "Game built successfully"
+            job.status = "succeeded"
+        except Exception as e:
+            job.message = f"Build failed: {e}"
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            job.save()
+            try:
+                os.remove(self.lock_path)
+            except OSError:
+                pass
+
+    def _running_job(self):
+        """Return the state of the build holding the lock, clearing stale locks."""
+        try:
+            with open(self.lock_path) as f:
+                job_id = f.read().strip()
+            lock_age = time.time() - os.path.getmtime(self.lock_path)
+        except OSError:
+            return None
+
+        state = self.get(job_id) if job_id else None
+        if (state is not None and state["status"] not in FINISHED
+                and lock_age < self.stale_after and _pid_alive(state["pid"])):
+            return state
+        if state is None and lock_age < self.save_interval + 1:
+            # The lock was just taken and the first state write has not landed yet.
+            return {"job_id": job_id, "status": "queued"}
+        try:
+            os.remove(self.lock_path)
+        except OSError:
+            pass
+        return None
+
+    def _prune(self):
+        """Forget all but the most recent keep_jobs job states."""
+        paths = [os.path.join(self.state_dir, name) for name in os.listdir(self.state_dir) if name.endswith(".json")]
+        paths.sort(key=os.path.getmtime, reverse=True)
+        for path in paths[self.keep_jobs:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _state_path(self, job_id):
+        return os.path.join(self.state_dir, f"{job_id}.json")
+
+
+def _pid_alive(pid):
+    """True unless pid is known to be gone (a worker that died mid-build)."""
+    if os.name != "posix" or pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def run_command(command, cwd=None):
+    """Return a work function that runs command and streams its output into the job log."""
+    def work(job):
+        job.log_line("$ " + " ".join(command))
+        process = subprocess.Popen(
+            command,
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+        )
+        for line in process.stdout:
+            job.log_line(line)
+        if process.wait() != 0:
+            raise RuntimeError(f"{command[0]} exited with status {process.returncode}")
+    return work
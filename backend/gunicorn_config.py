@@ -4,13 +4,50 @@ See the README.md file for details on running this app in production mode.
 """
 
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()  # load environment variables from .env file
 
+# Workers dump their metrics here so /metrics can add them up; inherited by the forked workers
+os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), f"birdgame-metrics-{os.getpid()}"))
+
 workers = int(os.environ.get("GUNICORN_PROCESSES", "2"))
 threads = int(os.environ.get("GUNICORN_THREADS", "4"))
 # timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
 bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5001")
 forwarded_allow_ips = "*"
-secure_scheme_headers = {"X-Forwarded-Proto": "https"}
\ No newline at end of file
+secure_scheme_headers = {"X-Forwarded-Proto": "https"}
+
+
+def on_starting(server):
+    """Start the metrics directory empty, so counters begin at zero with this master."""
+    from metrics import reset_directory
+
+    reset_directory(os.environ["METRICS_DIR"])
+
+
+def post_worker_init(worker):
+    """Start this worker's write-behind flusher and metrics dumps once the app is loaded."""
+    from app import app, metrics, progress_buffer
+
+    if app.config["WRITE_BEHIND"]:
+        progress_buffer.start()
+    metrics.start()
+
+
+def worker_exit(server, worker):
+    """Flush buffered progress and final metrics before the worker goes away."""
+    from app import app, metrics, progress_buffer
+
+    if app.config["WRITE_BEHIND"]:
+        progress_buffer.stop()
+        server.log.info("write-behind buffer stopped: %s", progress_buffer.stats())
+    metrics.stop()
+
+
+def child_exit(server, worker):
+    """Keep a reaped worker's counters in the metrics archive."""
+    from metrics import archive_worker
+
+    archive_worker(os.environ["METRICS_DIR"], worker.pid)
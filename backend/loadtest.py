@@ -0,0 +1,299 @@
+"""
+Load test the backend under gunicorn, for sizing workers and threads.
+
+    python loadtest.py --processes 1,2,4 --threads 2,4,8 --users 16 --duration 20
+    python loadtest.py --mongo-uri mongodb://localhost:27017/loadtest --json
+
+Every virtual user loops over the whole flow: register a fresh account, log
+in, then browse dashboard -> birds -> play -> one game asset --pages times.
+Redirects are not followed, so each route is timed on its own. For every
+GUNICORN_PROCESSES x GUNICORN_THREADS pair a new gunicorn is started from
+gunicorn_config.py, and the report gives per-route throughput and latency
+percentiles.
+
+Without --mongo-uri a throwaway mongod is started on a temporary dbpath, so
+`mongod` must be on PATH. With --mongo-uri, point it at a database you can
+fill with test accounts. /play and the asset return 404 until the game has
+been built; they are still timed, and the 404s are counted as errors.
+"""
+import argparse
+import contextlib
+import http.cookiejar
+import itertools
+import json
+import os
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+ROUTES = ("register", "login", "dashboard", "birds", "play", "asset")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port, timeout, process=None):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"{process.args[0]} exited with code {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"nothing listening on port {port} after {timeout}s")
+
+
+def stop(process, timeout=30):
+    if process.poll() is None:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+class LocalMongo:
+    """A mongod on a temporary dbpath, removed again on exit"""
+    def __init__(self, binary="mongod"):
+        self.binary = shutil.which(binary)
+        if self.binary is None:
+            raise RuntimeError("mongod is not on PATH; install MongoDB or pass --mongo-uri")
+        self.port = free_port()
+        self.dbpath = None
+        self.process = None
+
+    @property
+    def uri(self):
+        return f"mongodb://127.0.0.1:{self.port}/loadtest"
+
+    def __enter__(self):
+        self.dbpath = tempfile.mkdtemp(prefix="loadtest-mongo-")
+        self.process = subprocess.Popen(
+            [self.binary, "--dbpath", self.dbpath, "--port", str(self.port), "--bind_ip", "127.0.0.1", "--quiet"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        wait_for_port(self.port, 30, self.process)
+        return self
+
+    def __exit__(self, *exc):
+        stop(self.process)
+        shutil.rmtree(self.dbpath, ignore_errors=True)
+
+
+class Gunicorn:
+    """gunicorn_config.py with GUNICORN_PROCESSES/GUNICORN_THREADS overridden"""
+    def __init__(self, processes, threads, mongo_uri, log):
+        self.processes = processes
+        self.threads = threads
+        self.port = free_port()
+        self.env = dict(
+            os.environ,
+            GUNICORN_PROCESSES=str(processes),
+            GUNICORN_THREADS=str(threads),
+            GUNICORN_BIND=f"127.0.0.1:{self.port}",
+            MONGO_URI=mongo_uri,
+            SECRET_KEY=os.environ.get("SECRET_KEY", "loadtest"),
+        )
+        self.log = log
+        self.process = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "--config", "gunicorn_config.py", "wsgi:app"],
+            cwd=BACKEND_DIR,
+            env=self.env,
+            stdout=self.log,
+            stderr=subprocess.STDOUT,
+        )
+        wait_for_port(self.port, 60, self.process)
+        return self
+
+    def __exit__(self, *exc):
+        stop(self.process)
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Recorder:
+    """Latencies and status codes per route, shared by all virtual users"""
+    def __init__(self):
+        self.latencies = {route: [] for route in ROUTES}
+        self.statuses = {route: {} for route in ROUTES}
+        self._lock = threading.Lock()
+
+    def add(self, route, seconds, status):
+        with self._lock:
+            self.latencies[route].append(seconds)
+            self.statuses[route][status] = self.statuses[route].get(status, 0) + 1
+
+    def summary(self, elapsed):
+        routes = {}
+        for route in ROUTES:
+            samples = self.latencies[route]
+            if not samples:
+                continue
+            errors = sum(count for status, count in self.statuses[route].items() if not 200 <= status < 400)
+            routes[route] = dict(
+                requests=len(samples),
+                errors=errors,
+                rps=round(len(samples) / elapsed, 2),
+                statuses={str(status): count for status, count in sorted(self.statuses[route].items())},
+                **latency_percentiles(samples),
+            )
+        return routes
+
+
+def latency_percentiles(samples):
+    if len(samples) == 1:
+        p50 = p95 = p99 = samples[0]
+    else:
+        cuts = statistics.quantiles(samples, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    return {"p50_ms": round(p50 * 1000, 2), "p95_ms": round(p95 * 1000, 2), "p99_ms": round(p99 * 1000, 2)}
+
+
+class VirtualUser:
+    """One browser: its own cookie jar, redirects left to the caller"""
+    def __init__(self, base_url, recorder, asset, timeout=30):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.asset = asset
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            NoRedirect(),
+        )
+
+    def request(self, route, path, form=None):
+        data = urllib.parse.urlencode(form).encode() if form is not None else None
+        start = time.perf_counter()
+        try:
+            with self.opener.open(self.base_url + path, data=data, timeout=self.timeout) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            status = e.code
+        except OSError:
+            status = 0  # connection refused, reset or timed out
+        self.recorder.add(route, time.perf_counter() - start, status)
+        return status
+
+    def flow(self, pages):
+        username = f"load-{uuid.uuid4().hex[:12]}"
+        password = uuid.uuid4().hex
+        self.request("register", "/register", {"username": username, "password": password})
+        self.request("login", "/login", {"username": username, "password": password})
+        for _ in range(pages):
+            self.request("dashboard", "/dashboard")
+            self.request("birds", "/birds")
+            self.request("play", "/play")
+            self.request("asset", f"/game-assets/{self.asset}")
+
+
+def run_load(base_url, users, duration, pages, asset):
+    """users threads running flows until duration is up; returns the per-route summary"""
+    recorder = Recorder()
+    deadline = time.monotonic() + duration
+
+    def worker():
+        user = VirtualUser(base_url, recorder, asset)
+        while time.monotonic() < deadline:
+            user.flow(pages)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    routes = recorder.summary(elapsed)
+    total = sum(route["requests"] for route in routes.values())
+    return {"elapsed_s": round(elapsed, 2), "requests": total, "rps": round(total / elapsed, 2), "routes": routes}
+
+
+def sweep(mongo_uri, processes, threads, users, duration, pages, asset, log):
+    """Yield one run_load result per processes x threads pair, each against a fresh gunicorn"""
+    for p, t in itertools.product(processes, threads):
+        with Gunicorn(p, t, mongo_uri, log) as server:
+            result = run_load(server.base_url, users, duration, pages, asset)
+        result.update(processes=p, threads=t)
+        yield result
+
+
+def print_result(result):
+    print(f"\n{result['processes']} processes x {result['threads']} threads: "
+          f"{result['requests']} requests in {result['elapsed_s']}s ({result['rps']} req/s)")
+    print(f"  {'route':<10}{'requests':>9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for route, stats in result["routes"].items():
+        print(f"  {route:<10}{stats['requests']:>9}{stats['rps']:>9}{stats['p50_ms']:>9}"
+              f"{stats['p95_ms']:>9}{stats['p99_ms']:>9}{stats['errors']:>8}")
+
+
+def int_list(value):
+    try:
+        numbers = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated integers, got {value!r}")
+    if not numbers or min(numbers) < 1:
+        raise argparse.ArgumentTypeError(f"expected positive integers, got {value!r}")
+    return numbers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the backend under gunicorn")
+    parser.add_argument("--processes", type=int_list, default=[2], help="GUNICORN_PROCESSES values, e.g. 1,2,4")
+    parser.add_argument("--threads", type=int_list, default=[4], help="GUNICORN_THREADS values, e.g. 2,4,8")
+    parser.add_argument("--users", type=int, default=8, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds of load per configuration")
+    parser.add_argument("--pages", type=int, default=5, help="dashboard/birds/play/asset rounds per login")
+    parser.add_argument("--asset", default="bird_game.apk", help="file requested from /game-assets/")
+    parser.add_argument("--mongo-uri", help="use this database instead of starting a local mongod")
+    parser.add_argument("--log", default=os.devnull, help="file for gunicorn's output")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+    if args.users < 1 or args.duration <= 0 or args.pages < 0:
+        parser.error("--users must be >= 1, --duration > 0 and --pages >= 0")
+
+    results = []
+    with open(args.log, "a") as log, contextlib.ExitStack() as stack:
+        mongo_uri = args.mongo_uri or stack.enter_context(LocalMongo()).uri
+        for result in sweep(mongo_uri, args.processes, args.threads, args.users,
+                            args.duration, args.pages, args.asset, log):
+            results.append(result)
+            if not args.json:
+                print_result(result)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main()
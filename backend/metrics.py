@@ -0,0 +1,302 @@
+"""
+Prometheus-style metrics for the Flask app and its MongoDB traffic.
+
+Every gunicorn worker keeps its own counters. When METRICS_DIR is set, a
+thread in each worker dumps them to METRICS_DIR/<pid>.json every
+dump_interval seconds (and once more on exit), and /metrics adds up every
+file in the directory. When gunicorn reaps a worker, child_exit folds the worker's
+counters into archive.json, so totals never go backwards. Its gauges, such as
+in-flight requests, are dropped with it.
+"""
+
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+from flask import Response, request
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+ARCHIVE = "archive.json"
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+START_KEY = "metrics.start"  # in the WSGI environ: teardown can run after the app context is gone
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames, buckets):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [count per bucket..., +Inf], sum
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def state(self):
+        with self._lock:
+            series = [[list(labels), list(counts), total] for labels, (counts, total) in self._series.items()]
+        return {"help": self.help, "labelnames": list(self.labelnames), "buckets": list(self.buckets), "series": series}
+
+
+class MetricsRegistry:
+    """One worker's histograms plus collectors that report other components' stats on demand."""
+
+    def __init__(self, directory=None, dump_interval=5.0, prefix="birdgame_"):
+        self.directory = directory
+        self.dump_interval = dump_interval
+        self.prefix = prefix
+        self.histograms = {}
+        self.collectors = []
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+        self.request_seconds = self.histogram(
+            "http_request_duration_seconds", "Request latency by endpoint",
+            ("blueprint", "endpoint", "method", "status"), LATENCY_BUCKETS)
+        self.response_bytes = self.histogram(
+            "http_response_size_bytes", "Response body size by endpoint",
+            ("blueprint", "endpoint"), SIZE_BUCKETS)
+        self.mongo_seconds = self.histogram(
+            "mongodb_command_duration_seconds", "MongoDB command latency as seen by pymongo",
+            ("command", "outcome"), MONGO_BUCKETS)
+        self.add_collector(lambda: [gauge("http_requests_in_flight", "Requests being handled", self.in_flight)])
+
+    def histogram(self, name, help, labelnames, buckets):
+        histogram = self.histograms[self.prefix + name] = Histogram(self.prefix + name, help, labelnames, buckets)
+        return histogram
+
+    def add_collector(self, collect):
+        """collect() returns samples made with counter() and gauge(); it is called at every dump and scrape"""
+        self.collectors.append(collect)
+
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def snapshot(self):
+        samples = []
+        for collect in self.collectors:
+            samples.extend(collect())
+        for sample in samples:
+            sample["name"] = self.prefix + sample["name"]
+        return {
+            "histograms": {name: histogram.state() for name, histogram in self.histograms.items()},
+            "samples": samples,
+        }
+
+    def dump(self):
+        """Write this worker's snapshot to METRICS_DIR/<pid>.json."""
+        if self.directory:
+            write_json(os.path.join(self.directory, f"{os.getpid()}.json"), self.snapshot())
+
+    def start(self):
+        if self._thread is not None or not self.directory:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-dump", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the dump thread and write the final snapshot."""
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join(timeout=self.dump_interval + 5)
+            self._thread = None
+        self.dump()
+
+    def _run(self):
+        while not self._stopping.wait(self.dump_interval):
+            try:
+                self.dump()
+            except OSError:
+                logger.exception("could not write metrics to %s", self.directory)
+
+    def collect(self):
+        """Snapshot of every live worker plus the archive of reaped ones, merged."""
+        if not self.directory:
+            return self.snapshot()
+        self.dump()
+        return merge(read_json(path) for path in glob.glob(os.path.join(self.directory, "*.json")))
+
+    def render(self):
+        return render(self.collect())
+
+
+def counter(name, help, value, **labels):
+    """Monotonic total; summed across workers and kept after a worker exits."""
+    return {"name": name, "type": "counter", "help": help, "labels": labels, "value": value}
+
+
+def gauge(name, help, value, agg="sum", **labels):
+    """Point-in-time value; summed (or max'd) across live workers only."""
+    return {"name": name, "type": "gauge", "help": help, "labels": labels, "value": value, "agg": agg}
+
+
+def merge(snapshots, keep_gauges=True):
+    histograms = {}
+    samples = {}
+    for snapshot in snapshots:
+        if snapshot is None:
+            continue
+        for name, state in snapshot["histograms"].items():
+            merged = histograms.setdefault(name, dict(state, series=[]))
+            if merged["buckets"] != state["buckets"]:
+                continue  # a worker from before a bucket change; its counts do not line up
+            by_labels = {tuple(series[0]): series for series in merged["series"]}
+            for labels, counts, total in state["series"]:
+                existing = by_labels.get(tuple(labels))
+                if existing is None:
+                    merged["series"].append([labels, list(counts), total])
+                    by_labels[tuple(labels)] = merged["series"][-1]
+                else:
+                    existing[1] = [a + b for a, b in zip(existing[1], counts)]
+                    existing[2] += total
+        for sample in snapshot["samples"]:
+            if sample["type"] == "gauge" and not keep_gauges:
+                continue
+            key = (sample["name"], tuple(sorted(sample["labels"].items())))
+            existing = samples.get(key)
+            if existing is None:
+                samples[key] = dict(sample)
+            elif sample.get("agg") == "max":
+                existing["value"] = max(existing["value"], sample["value"])
+            else:
+                existing["value"] += sample["value"]
+    return {"histograms": histograms, "samples": list(samples.values())}
+
+
+def archive_worker(directory, pid):
+    """gunicorn child_exit: keep a reaped worker's counters and histograms, drop its gauges."""
+    path = os.path.join(directory, f"{pid}.json")
+    snapshot = read_json(path)
+    if snapshot is None:
+        return
+    archive_path = os.path.join(directory, ARCHIVE)
+    write_json(archive_path, merge([read_json(archive_path), snapshot], keep_gauges=False))
+    os.remove(path)
+
+
+def reset_directory(directory):
+    """gunicorn on_starting: counters start from zero with the new master."""
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        os.remove(path)
+
+
+def read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def render(snapshot):
+    """Prometheus text exposition format."""
+    lines = []
+    for name, state in sorted(snapshot["histograms"].items()):
+        lines.append(f"# HELP {name} {state['help']}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, counts, total in sorted(state["series"]):
+            base = dict(zip(state["labelnames"], labels))
+            cumulative = 0
+            for bound, count in zip(list(state["buckets"]) + ["+Inf"], counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{format_labels(dict(base, le=bound))} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(base)} {total}")
+            lines.append(f"{name}_count{format_labels(base)} {cumulative}")
+
+    by_name = {}
+    for sample in snapshot["samples"]:
+        by_name.setdefault(sample["name"], []).append(sample)
+    for name, samples in sorted(by_name.items()):
+        lines.append(f"# HELP {name} {samples[0]['help']}")
+        lines.append(f"# TYPE {name} {samples[0]['type']}")
+        for sample in sorted(samples, key=lambda s: sorted(s["labels"].items())):
+            lines.append(f"{name}{format_labels(sample['labels'])} {sample['value']}")
+    return "\n".join(lines) + "\n"
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Times every command pymongo sends; pass to MongoClient(event_listeners=[...])."""
+
+    def __init__(self, registry):
+        self.registry = registry
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.registry.mongo_seconds.observe(event.duration_micros / 1e6, event.command_name, "success")
+
+    def failed(self, event):
+        self.registry.mongo_seconds.observe(event.duration_micros / 1e6, event.command_name, "failure")
+
+
+def instrument(app, registry, path="/metrics"):
+    """Time every request, count in-flight ones and serve the merged metrics at path."""
+
+    @app.before_request
+    def start_timer():
+        request.environ[START_KEY] = time.perf_counter()
+        registry.request_started()
+
+    @app.after_request
+    def record(response):
+        start = request.environ.get(START_KEY)
+        if start is not None:
+            blueprint = request.blueprint or ""
+            endpoint = request.endpoint or "unmatched"  # 404s must not add a series per URL
+            registry.request_seconds.observe(
+                time.perf_counter() - start, blueprint, endpoint, request.method, str(response.status_code))
+            if response.content_length is not None:
+                registry.response_bytes.observe(response.content_length, blueprint, endpoint)
+        return response
+
+    @app.teardown_request
+    def finish(exc):
+        if request.environ.pop(START_KEY, None) is not None:
+            registry.request_finished()
+
+    @app.route(path)
+    def metrics():
+        return Response(registry.render(), content_type=CONTENT_TYPE)
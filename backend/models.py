@@ -0,0 +1,276 @@
+"""
+Data access for the users collection.
+
+Every query against mongo.db.users goes through UserRepository, so projections,
+indexes and timings are tuned in one place. Routes never build queries inline.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+# Fields each view is allowed to read. Nothing outside login ever loads the password hash.
+LOGIN_FIELDS = ("password",)
+OFFLINE_FIELDS = ("last_seen", "income_rate")
+DASHBOARD_FIELDS = ("money",)
+COLLECTION_FIELDS = ("birds",)
+
+# Sync idempotency state kept per user: the most recent sessions (page loads)
+# and, for each, the most recent batch seqs applied.
+MAX_SYNC_SESSIONS = 8
+MAX_SYNC_SEQS = 64
+# Seconds of income a session may report beyond its age, for gold earned before its first batch.
+SYNC_GOLD_SLACK = 60
+
+
+def projection(fields):
+    return {field: 1 for field in fields}
+
+
+def as_object_id(user_id):
+    return user_id if isinstance(user_id, ObjectId) else ObjectId(user_id)
+
+
+def income_rate_delta(birds):
+    """
+    Gold per second that newly collected birds add to a user's idle income.
+    The game pays each bird's gold_per_minute every second (GameState.tick),
+    so time away is credited at that same rate.
+    """
+    return sum(bird.get("gold_per_minute", 0) for bird in birds)
+
+
+def seq_applied(sync_session, seq):
+    """
+    Whether a batch was already applied, given the user's sync_sessions entry
+    for its session (None for a new session). Once the entry holds
+    MAX_SYNC_SEQS seqs, anything older than all of them counts as applied,
+    so an old batch cannot be replayed.
+    """
+    seqs = (sync_session or {}).get("seqs", [])
+    return seq in seqs or (len(seqs) >= MAX_SYNC_SEQS and seq < min(seqs))
+
+
+def offline_credit(user, now, max_offline, min_gap):
+    """
+    Idle earnings since user["last_seen"]: income_rate * elapsed, with elapsed
+    capped at max_offline. Gaps up to min_gap are normal time between syncs of
+    a running game, which earns its own gold, so they are not credited.
+    """
+    last_seen = user.get("last_seen")
+    if last_seen is None or now - last_seen <= min_gap:
+        return 0
+    return (user.get("income_rate") or 0) * min(now - last_seen, max_offline)
+
+
+def progress_update(session_id, batches, now=None, seen=None, max_offline=0, min_gap=0):
+    """
+    Update pipeline applying (seq, gold, birds) batches of one client session.
+
+    sync_sessions holds {id, seqs, started, earned, at} for the user's last
+    MAX_SYNC_SESSIONS sessions, with the last MAX_SYNC_SEQS seqs applied in
+    each. A batch whose seq is already there (see seq_applied) adds nothing,
+    so retries are idempotent and batches may arrive in any order.
+
+    Gold is client-reported, so a session is paid at most what its income
+    rate could have earned since it started (plus SYNC_GOLD_SLACK seconds);
+    anything above that is dropped. last_seen moves forward to seen (default
+    now). The first write of a new session also credits offline_credit() up
+    to now. Later writes never do: while a session runs, the client earns
+    that gold itself.
+    """
+    now = now if now is not None else time.time()
+    seen = seen if seen is not None else now
+    sessions = {"$ifNull": ["$sync_sessions", []]}
+    away = {"$subtract": [now, "$last_seen"]}
+    credit = {"$cond": [
+        {"$and": [{"$eq": [{"$type": "$_session"}, "missing"]}, {"$gt": [away, min_gap]}]},
+        {"$multiply": [{"$ifNull": ["$income_rate", 0]}, {"$min": [away, max_offline]}]},
+        0,
+    ]}
+    fresh = [{"$arrayElemAt": ["$_fresh", index]} for index in range(len(batches))]
+    earnable = {"$subtract": [
+        {"$multiply": ["$_rate", {"$add": [{"$subtract": [seen, "$_started"]}, SYNC_GOLD_SLACK]}]},
+        "$_earned",
+    ]}
+    return [
+        {"$set": {"_session": {"$arrayElemAt": [
+            {"$filter": {"input": sessions, "as": "s", "cond": {"$eq": ["$$s.id", session_id]}}}, 0]}}},
+        {"$set": {
+            "_applied": {"$ifNull": ["$_session.seqs", []]},
+            "_started": {"$ifNull": ["$_session.started", now]},
+            "_earned": {"$ifNull": ["$_session.earned", 0]},
+        }},
+        {"$set": {"_fresh": [
+            {"$not": [{"$or": [
+                {"$in": [seq, "$_applied"]},
+                {"$and": [{"$gte": [{"$size": "$_applied"}, MAX_SYNC_SEQS]}, {"$lt": [seq, {"$min": "$_applied"}]}]},
+            ]}]}
+            for seq, _, _ in batches
+        ]}},
+        {"$set": {
+            "_gold": {"$add": [0] + [{"$cond": [is_fresh, gold, 0]} for is_fresh, (_, gold, _) in zip(fresh, batches)]},
+            "_rate": {"$add": [{"$ifNull": ["$income_rate", 0]}] + [
+                {"$cond": [is_fresh, income_rate_delta(birds), 0]} for is_fresh, (_, _, birds) in zip(fresh, batches)]},
+        }},
+        {"$set": {"_paid": {"$max": [0, {"$min": ["$_gold", earnable]}]}}},
+        {"$set": {
+            "money": {"$add": [{"$ifNull": ["$money", 0]}, credit, "$_paid"]},
+            "income_rate": "$_rate",
+            "birds": {"$concatArrays": [{"$ifNull": ["$birds", []]}] + [
+                {"$cond": [is_fresh, {"$literal": list(birds)}, []]} for is_fresh, (_, _, birds) in zip(fresh, batches)]},
+            "last_seen": {"$max": ["$last_seen", seen]},
+            "sync_sessions": {"$slice": [{"$concatArrays": [
+                {"$filter": {"input": sessions, "as": "s", "cond": {"$ne": ["$$s.id", session_id]}}},
+                [{
+                    "id": session_id,
+                    "seqs": {"$slice": [{"$concatArrays": ["$_applied"] + [
+                        {"$cond": [is_fresh, [seq], []]} for is_fresh, (seq, _, _) in zip(fresh, batches)]}, -MAX_SYNC_SEQS]},
+                    "started": "$_started",
+                    "earned": {"$add": ["$_earned", "$_paid"]},
+                    "at": seen,
+                }],
+            ]}, -MAX_SYNC_SESSIONS]},
+        }},
+        {"$unset": ["_session", "_applied", "_started", "_earned", "_fresh", "_gold", "_rate", "_paid"]},
+    ]
+
+
+class QueryStats:
+    """Per-query call counts and latencies, with slow queries logged."""
+
+    def __init__(self, slow_threshold=0.1):
+        self.slow_threshold = slow_threshold
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stat = self._stats.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+                stat["count"] += 1
+                stat["total"] += elapsed
+                stat["max"] = max(stat["max"], elapsed)
+            if elapsed >= self.slow_threshold:
+                logger.warning("slow users query %s took %.1f ms", name, elapsed * 1000)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {
+                    "count": stat["count"],
+                    "total_ms": stat["total"] * 1000,
+                    "avg_ms": stat["total"] * 1000 / stat["count"],
+                    "max_ms": stat["max"] * 1000,
+                }
+                for name, stat in self._stats.items()
+            }
+
+
+class UserRepository:
+    def __init__(self, get_collection, cache=None, stats=None):
+        self.get_collection = get_collection
+        self.cache = cache
+        self.stats = stats or QueryStats()
+
+    def ensure_indexes(self):
+        with self.stats.timed("ensure_indexes"):
+            self.get_collection().create_index("username", unique=True, name="username_unique")
+
+    def migrate_income_rates(self):
+        """
+        Recompute income_rate from the stored birds wherever the two disagree.
+        Rates written before income_rate_delta moved to the game's per-second
+        scale are 60x too low. Safe to call on every startup; returns the
+        number of users fixed.
+        """
+        rate = {"$sum": "$birds.gold_per_minute"}
+        with self.stats.timed("migrate_income_rates"):
+            result = self.get_collection().update_many(
+                {"$expr": {"$ne": [{"$ifNull": ["$income_rate", 0]}, rate]}},
+                [{"$set": {"income_rate": rate}}],
+            )
+        return result.modified_count
+
+    def create(self, username, password_hash):
+        """Insert a new user. Raises DuplicateKeyError if the username is taken."""
+        with self.stats.timed("create"):
+            self.get_collection().insert_one({
+                "username": username, "password": password_hash, "money": 0, "birds": [],
+                "income_rate": 0, "last_seen": time.time(),
+            })
+
+    def find_for_login(self, username):
+        with self.stats.timed("find_for_login"):
+            return self.get_collection().find_one({"username": username}, projection(LOGIN_FIELDS))
+
+    def update_password(self, user_id, password_hash):
+        with self.stats.timed("update_password"):
+            self.get_collection().update_one({"_id": as_object_id(user_id)}, {"$set": {"password": password_hash}})
+
+    def get_profile(self, user_id, fields):
+        """Fetch only the given fields of a user, going through the profile cache."""
+        key = str(user_id)
+        if self.cache is not None:
+            cached = self.cache.get(key, fields)
+            if cached is not None:
+                return cached
+
+        with self.stats.timed("get_profile"):
+            user = self.get_collection().find_one({"_id": as_object_id(user_id)}, projection(fields))
+        if user is not None and self.cache is not None:
+            # Cache absent fields too (older documents), or they would miss every time.
+            for field in fields:
+                user.setdefault(field, None)
+            self.cache.put(key, user)
+        return user
+
+    def get_dashboard(self, user_id):
+        return self.get_profile(user_id, DASHBOARD_FIELDS)
+
+    def get_collection_page(self, user_id):
+        return self.get_profile(user_id, COLLECTION_FIELDS)
+
+    def apply_progress(self, user_id, session_id, seq, gold=0, birds=(), now=None, max_offline=0, min_gap=0):
+        """
+        Apply one sync batch with a single find_one_and_update (see
+        progress_update). seq counts batches within one client session (a
+        page load). Returns the amount of time away credited, or None if the
+        batch had already been applied.
+        """
+        now = now if now is not None else time.time()
+        with self.stats.timed("apply_progress"):
+            before = self.get_collection().find_one_and_update(
+                {"_id": as_object_id(user_id)},
+                progress_update(session_id, [(seq, gold, list(birds))], now, max_offline=max_offline, min_gap=min_gap),
+                projection={**projection(OFFLINE_FIELDS), "sync_sessions": {"$elemMatch": {"id": session_id}}},
+                return_document=ReturnDocument.BEFORE,
+            )
+        self.invalidate(user_id)
+        if before is None:
+            return None
+        sync_session = (before.get("sync_sessions") or [None])[0]
+        if seq_applied(sync_session, seq):
+            return None
+        if sync_session is not None:
+            return 0
+        return offline_credit(before, now, max_offline, min_gap)
+
+    def bulk_write(self, operations, ordered=False):
+        with self.stats.timed("bulk_write"):
+            return self.get_collection().bulk_write(operations, ordered=ordered)
+
+    def invalidate(self, user_id):
+        if self.cache is not None:
+            self.cache.invalidate(str(user_id))
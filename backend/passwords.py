@@ -0,0 +1,107 @@
+"""
+Password hashing off the request threads.
+
+scrypt costs tens of milliseconds of CPU per call. Hashing runs in a small
+dedicated thread pool with a bounded queue. A request thread waits for its hash,
+so admissions are capped below the worker's request threads: a burst of logins
+always leaves at least one gunicorn thread free, and callers beyond the cap get
+HasherBusy instead of waiting. hashlib.scrypt releases the GIL, so the pool
+really runs in parallel with request handling.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = "scrypt:32768:8:1"
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing queue is full."""
+
+
+class PasswordHasher:
+    def __init__(self, method=DEFAULT_METHOD, max_workers=2, max_queue=32, request_threads=None):
+        # werkzeug fills in default costs ("scrypt" -> "scrypt:32768:8:1") in the
+        # hash prefix, so compare against that, not against the configured string.
+        self.method = generate_password_hash("", method=method).split("$", 1)[0]
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self.max_in_flight = max_workers + max_queue
+        if request_threads is not None:
+            self.max_in_flight = max(1, min(self.max_in_flight, request_threads - 1))
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def hash(self, password):
+        return self._submit(generate_password_hash, password, method=self.method).result()
+
+    def verify(self, pwhash, password):
+        return self._submit(check_password_hash, pwhash, password).result()
+
+    def needs_rehash(self, pwhash):
+        """True if pwhash was made with a different method or cost than the current one."""
+        return pwhash.split("$", 1)[0] != self.method
+
+    def rehash_later(self, password, save):
+        """Hash password with the current parameters in the background and pass the result to save."""
+        try:
+            future = self._submit(generate_password_hash, password, method=self.method)
+        except HasherBusy:
+            return  # try again on the next login
+        future.add_done_callback(lambda f: f.exception() is None and save(f.result()))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._in_flight - self._running,
+                "running": self._running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_ms": self.total_seconds * 1000 / self.completed if self.completed else 0.0,
+                "max_ms": self.max_seconds * 1000,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def _submit(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HasherBusy("password hashing queue is full")
+        with self._lock:
+            self._in_flight += 1
+        try:
+            return self._executor.submit(self._timed, fn, *args, **kwargs)
+        except RuntimeError:
+            self._release(0.0, ran=False)
+            raise
+
+    def _timed(self, fn, *args, **kwargs):
+        with self._lock:
+            self._running += 1
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._release(time.perf_counter() - start)
+
+    def _release(self, elapsed, ran=True):
+        with self._lock:
+            self._in_flight -= 1
+            if ran:
+                self._running -= 1
+                self.completed += 1
+                self.total_seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+        self._slots.release()
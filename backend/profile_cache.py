@@ -0,0 +1,60 @@
+"""
+In-process cache of partial user documents, keyed by user id.
+
+Entries expire after a TTL and the least recently used entry is evicted once
+the cache is full. Only the fields that were actually fetched are cached, so a
+lookup for fields that are not present yet counts as a miss.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class ProfileCache:
+    def __init__(self, max_entries=5000, ttl=10.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, fields):
+        """Return the cached fields for user_id, or None if any are missing or stale."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] <= self.clock():
+                del self._entries[user_id]
+                entry = None
+            if entry is None or not all(field in entry[1] for field in fields):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return {field: entry[1][field] for field in fields}
+
+    def put(self, user_id, doc):
+        """Merge the fields of doc into the entry for user_id."""
+        with self._lock:
+            now = self.clock()
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= now:
+                entry = (now + self.ttl, {})
+                self._entries[user_id] = entry
+            entry[1].update(doc)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,8 +1,12 @@
 import pytest
 import os
 import sys
+import json
+import time
 import pygame
 import asyncio
+import statistics
+import tracemalloc
 from unittest.mock import MagicMock
 
 # Mock modules that exist only in the web environment
@@ -17,6 +21,8 @@ os.environ['SDL_VIDEODRIVER'] = 'dummy'
 # Initialize pygame for all tests
 def pytest_configure(config):
     """Initialize pygame once for all tests"""
+    config.addinivalue_line("markers", "benchmark: frame-time benchmark, only run with --benchmark")
+    config.stash[benchmark_results_key] = {}
     pygame.init()
 
 def pytest_unconfigure(config):
@@ -29,4 +35,152 @@ def event_loop():
     """Create an event loop for each test case"""
     loop = asyncio.get_event_loop_policy().new_event_loop()
     yield loop
-    loop.close()
\ No newline at end of file
+    loop.close()
+
+# Frame-time benchmarks (opt-in)
+BENCHMARK_BASELINE = os.path.join(os.path.dirname(__file__), "benchmarks", "baseline.json")
+# Metrics compared against the baseline; p99 is recorded but too noisy to gate on
+GATED_METRICS = {"p50_ms": 0.05, "p95_ms": 0.1, "alloc_p95_kb": 4.0}  # metric -> absolute slack
+
+benchmark_results_key = pytest.StashKey[dict]()
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark", "frame-time benchmarks")
+    group.addoption("--benchmark", action="store_true", help="run the tests marked benchmark")
+    group.addoption("--benchmark-save", action="store_true", help="write this run's results as the new baseline")
+    group.addoption("--benchmark-baseline", default=BENCHMARK_BASELINE, help="baseline JSON file (default: %(default)s)")
+    group.addoption("--benchmark-threshold", type=float, default=0.25,
+                    help="fail when a gated metric is this fraction worse than the baseline (default: %(default)s)")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmark: run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+def percentile_summary(samples, scale=1000):
+    """p50/p95/p99/mean of samples, multiplied by scale (seconds -> ms by default)"""
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50": round(cuts[49] * scale, 4),
+        "p95": round(cuts[94] * scale, 4),
+        "p99": round(cuts[98] * scale, 4),
+        "mean": round(statistics.fmean(samples) * scale, 4),
+    }
+
+class FrameBench:
+    """
+    Runs a scenario twice: once timed and once under tracemalloc. The scenario
+    calls mark() at every frame boundary; the first `warmup` frames are dropped.
+    tracemalloc only sees Python allocations, not SDL's pixel buffers.
+    """
+    def __init__(self, baseline, threshold, results):
+        self.baseline = baseline
+        self.threshold = threshold
+        self.results = results
+
+    def run(self, name, scenario, warmup=5):
+        times = self._drive(scenario, warmup, traced=False)
+        allocs = self._drive(scenario, warmup, traced=True)
+        timing = percentile_summary(times)
+        memory = percentile_summary(allocs[:-1], scale=1 / 1024)
+        result = {
+            "frames": len(times),
+            "p50_ms": timing["p50"],
+            "p95_ms": timing["p95"],
+            "p99_ms": timing["p99"],
+            "mean_ms": timing["mean"],
+            "alloc_p50_kb": memory["p50"],
+            "alloc_p95_kb": memory["p95"],
+            "retained_kb": round(allocs[-1] / 1024, 2),
+        }
+        self.results[name] = result
+        problems = self.regressions(name)
+        if problems:
+            pytest.fail(f"{name} regressed by more than {self.threshold:.0%}: " + "; ".join(problems))
+        return result
+
+    def regressions(self, name):
+        """Gated metrics of name that are worse than the baseline by more than the threshold"""
+        old = self.baseline.get(name)
+        new = self.results[name]
+        if old is None:
+            return []
+        return [
+            f"{metric}: {new[metric]} vs baseline {old[metric]}"
+            for metric, slack in GATED_METRICS.items()
+            if metric in old and new[metric] > old[metric] * (1 + self.threshold) + slack
+        ]
+
+    def _drive(self, scenario, warmup, traced):
+        samples = []
+        state = {"last": None, "base": 0, "frame": 0}
+
+        def mark():
+            state["frame"] += 1
+            if traced:
+                current, peak = tracemalloc.get_traced_memory()
+                if state["frame"] > warmup:
+                    samples.append(peak - state["base"])
+                tracemalloc.reset_peak()
+                state["base"] = current
+            else:
+                now = time.perf_counter()
+                if state["last"] is not None and state["frame"] > warmup:
+                    samples.append(now - state["last"])
+                state["last"] = now
+
+        if traced:
+            tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0] if traced else 0
+            result = scenario(mark)
+            if asyncio.iscoroutine(result):
+                asyncio.run(result)
+            if traced:
+                samples.append(tracemalloc.get_traced_memory()[0] - start)  # retained over the whole run
+        finally:
+            if traced:
+                tracemalloc.stop()
+        return samples
+
+@pytest.fixture
+def frame_bench(request):
+    """FrameBench whose run() fails the test when a scenario regressed against the baseline"""
+    config = request.config
+    path = config.getoption("--benchmark-baseline")
+    baseline = {}
+    if os.path.exists(path) and not config.getoption("--benchmark-save"):
+        with open(path) as f:
+            baseline = json.load(f)
+    return FrameBench(baseline, config.getoption("--benchmark-threshold"), config.stash[benchmark_results_key])
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    results = config.stash.get(benchmark_results_key, {})
+    if not results or not config.getoption("--benchmark-save"):
+        return
+    path = config.getoption("--benchmark-baseline")
+    baseline = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            baseline = json.load(f)
+    baseline.update(results)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    results = config.stash.get(benchmark_results_key, {})
+    if not results:
+        return
+    terminalreporter.section("frame-time benchmarks")
+    terminalreporter.write_line(f"{'scenario':<22}{'frames':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'alloc p95 KB':>14}{'retained KB':>13}")
+    for name, r in sorted(results.items()):
+        terminalreporter.write_line(
+            f"{name:<22}{r['frames']:>7}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}"
+            f"{r['alloc_p95_kb']:>14.1f}{r['retained_kb']:>13.1f}"
+        )
@@ -2,20 +2,22 @@ import pygame
 import asyncio
 import js
 
-# After a bird is collected:
-js.fetch("/update-birds", {
+# After a bird is collected, batch the catch and the gold earned since the
+# last sync into one request. sync_session is a random id made once per page
+# load; seq increases per batch within it, so retries are safe. The first
+# batch of a load is what credits time away, so send one (even with no
+# events) as soon as the game starts.
+sync_seq += 1
+js.fetch("/sync-progress", {
     "method": "POST",
     "headers": js.Object.fromEntries([["Content-Type", "application/json"]]),
     "body": js.JSON.stringify({
-        "birds": [b.name for b in collected_birds],
-    })
-})
-
-js.fetch("/update-money", {
-    "method": "POST",
-    "headers": js.Object.fromEntries([["Content-Type", "application/json"]]),
-    "body": js.JSON.stringify({
-        "money": int(gold)
+        "session": sync_session,
+        "seq": sync_seq,
+        "events": [
+            {"type": "collect", "bird": {"name": b.name, "rarity": b.rarity, "gold_per_minute": b.gold_per_minute}}
+            for b in new_birds
+        ] + [{"type": "gold", "amount": gold - synced_gold}],
     })
 })
 
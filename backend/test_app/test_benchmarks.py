@@ -0,0 +1,158 @@
+"""
+Frame-time benchmarks for the game under the dummy SDL driver.
+
+    pytest test_app/test_benchmarks.py --benchmark                  # compare with the baseline
+    pytest test_app/test_benchmarks.py --benchmark --benchmark-save  # record a new baseline
+
+Baselines are machine specific: record one before a change and compare after it
+on the same machine. Use --benchmark-threshold to loosen or tighten the gate.
+"""
+import os
+from unittest import mock
+
+import pygame
+import pytest
+
+import bird_game.main as game_main
+from bird_game.engine import DECO_PRICES, RARITY_ASSIGNMENTS
+
+pytestmark = pytest.mark.benchmark
+
+FRAMES = 300
+SPRITE_CALLS = 200
+BIRD_DIR = os.path.join(game_main.BASE_DIR, "assets", "birds")
+DECO_DIR = os.path.join(game_main.BASE_DIR, "assets", "decoration")
+
+
+@pytest.fixture(autouse=True)
+def setup_pygame():
+    pygame.init()
+    game_main.error_messages.clear()
+    game_main.text_cache.clear()
+    game_main.greyscale_cache.clear()
+    yield
+    pygame.quit()
+
+
+class FakeClock:
+    """pygame Clock that never sleeps and reports a steady ACTIVE_FPS frame time"""
+    def tick(self, framerate=0):
+        return self.get_time()
+
+    def get_time(self):
+        return 1000 // game_main.ACTIVE_FPS
+
+
+def event_feed(mark, frames, script, final):
+    """pygame.event.get replacement: one call per frame, marks the boundary and plays script(frame)"""
+    state = {"frame": 0}
+
+    def get(*args, **kwargs):
+        mark()
+        state["frame"] += 1
+        if state["frame"] >= frames:
+            return [final]
+        return script(state["frame"])
+    return get
+
+
+def bird_paths():
+    return [os.path.join(BIRD_DIR, name) for name in sorted(os.listdir(BIRD_DIR)) if name.endswith(".png")]
+
+
+def test_main_loop_frames(frame_bench, monkeypatch):
+    monkeypatch.setattr(pygame.mixer, "init", lambda: None)
+    monkeypatch.setattr(pygame.mixer, "Sound", lambda *args, **kwargs: mock.Mock(play=lambda: None))
+    monkeypatch.setattr(pygame.time, "Clock", FakeClock)
+    governor = game_main.FrameGovernor
+    monkeypatch.setattr(game_main, "FrameGovernor", lambda: governor(idle_after=float("inf")))
+    monkeypatch.setattr(game_main, "SPAWN_SEED", 0)
+    monkeypatch.setattr("builtins.print", lambda *args, **kwargs: None)
+
+    spawn_points = game_main.GameState().spawn_points
+
+    def script(frame):
+        # Move the mouse every frame and click a perch every 15th, collecting whatever sits there
+        events = [pygame.event.Event(pygame.MOUSEMOTION, {"pos": (frame % 800, 300), "rel": (1, 0), "buttons": (0, 0, 0)})]
+        if frame % 15 == 0:
+            x, y = spawn_points[(frame // 15) % len(spawn_points)]
+            events.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN, {"pos": (x + 20, y + 20), "button": 1}))
+        return events
+
+    def scenario(mark):
+        monkeypatch.setattr(pygame.event, "get", event_feed(mark, FRAMES, script, pygame.event.Event(pygame.QUIT)))
+        pygame.init()
+        return game_main.main()
+
+    frame_bench.run("main_loop", scenario)
+    assert not game_main.error_messages
+
+
+def test_birdiary_scroll_frames(frame_bench, monkeypatch):
+    sprites = [game_main.load_sprite(path, game_main.SCREEN_WIDTH // 10) for path in bird_paths()]
+    names = [name for tier in RARITY_ASSIGNMENTS.values() for name in tier]
+    bird_types = game_main.make_bird_types(images={name: sprites[i % len(sprites)] for i, name in enumerate(names)})
+    collected = {bird.name for bird in bird_types[::2]}
+    atlas = game_main.ThumbnailAtlas({bird.name: bird.image for bird in bird_types})
+    fonts = game_main.ListFonts()
+    screen = pygame.display.set_mode((game_main.SCREEN_WIDTH, game_main.SCREEN_HEIGHT))
+
+    def script(frame):
+        # Scroll back and forth so every frame redraws
+        return [pygame.event.Event(pygame.MOUSEWHEEL, {"x": 0, "y": -1 if (frame // 10) % 2 == 0 else 1})]
+
+    def scenario(mark):
+        back = pygame.event.Event(pygame.MOUSEBUTTONDOWN, {"pos": (game_main.SCREEN_WIDTH - 70, 35), "button": 1})
+        monkeypatch.setattr(pygame.event, "get", event_feed(mark, FRAMES, script, back))
+        return game_main.show_birdiary(screen, collected, bird_types, atlas=atlas, fonts=fonts)
+
+    frame_bench.run("show_birdiary", scenario)
+    assert not game_main.error_messages
+
+
+def test_store_frames(frame_bench, monkeypatch):
+    deco_assets = {
+        name: game_main.load_sprite(os.path.join(DECO_DIR, f"{name.lower().replace(' ', '_')}.png"), game_main.SCREEN_WIDTH // 8)
+        for name in DECO_PRICES
+    }
+    atlas = game_main.ThumbnailAtlas(deco_assets)
+    fonts = game_main.ListFonts()
+    screen = pygame.display.set_mode((game_main.SCREEN_WIDTH, game_main.SCREEN_HEIGHT))
+    purchased = set()
+
+    def script(frame):
+        # The store list fits on screen, so flip a purchase every frame to force a redraw
+        purchased.symmetric_difference_update({"Lamp"})
+        return []
+
+    def scenario(mark):
+        purchased.clear()
+        back = pygame.event.Event(pygame.MOUSEBUTTONDOWN, {"pos": (game_main.SCREEN_WIDTH - 70, 35), "button": 1})
+        monkeypatch.setattr(pygame.event, "get", event_feed(mark, FRAMES, script, back))
+        return game_main.show_store(screen, purchased, 500, deco_assets, DECO_PRICES, {}, mock.Mock(), atlas=atlas, fonts=fonts)
+
+    frame_bench.run("show_store", scenario)
+    assert not game_main.error_messages
+
+
+def test_greyscale_surface_calls(frame_bench):
+    sprite = game_main.load_scaled_image(os.path.join(BIRD_DIR, "owl.png"), game_main.SCREEN_WIDTH // 10)
+
+    def scenario(mark):
+        for _ in range(SPRITE_CALLS):
+            game_main.greyscale_surface(sprite)
+            mark()
+
+    frame_bench.run("greyscale_surface", scenario)
+
+
+def test_load_scaled_image_calls(frame_bench):
+    paths = bird_paths()
+
+    def scenario(mark):
+        for i in range(SPRITE_CALLS):
+            game_main.load_scaled_image(paths[i % len(paths)], game_main.SCREEN_WIDTH // 10)
+            mark()
+
+    frame_bench.run("load_scaled_image", scenario)
+    assert not game_main.error_messages
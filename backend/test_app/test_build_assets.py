@@ -0,0 +1,94 @@
+import sys
+import os
+import gzip
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import app as app_module
+from app import app
+import build_assets
+from build_assets import BuildManifest, ManifestStore, precompress
+
+INDEX = b"<html>" + b"bird " * 2000 + b"</html>"
+
+def make_build(tmp_path, build_id):
+    build = tmp_path / "cache" / build_id
+    build.mkdir(parents=True)
+    (build / "index.html").write_bytes(INDEX)
+    (build / "favicon.png").write_bytes(os.urandom(2048))
+    precompress(str(build))
+    return build
+
+@pytest.fixture
+def web_dir(tmp_path, monkeypatch):
+    make_build(tmp_path, "abc123")
+    web = tmp_path / "web"
+    web.symlink_to(os.path.join("cache", "abc123"))
+    monkeypatch.setattr(app_module, "WEB_DIR", str(web))
+    monkeypatch.setattr(build_assets, "manifests", ManifestStore(recheck_interval=0))
+    return web
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+def test_precompress_only_shrinkable_files(web_dir):
+    assert gzip.decompress((web_dir / "index.html.gz").read_bytes()) == INDEX
+    assert not (web_dir / "favicon.png.gz").exists()
+
+def test_gzip_variant_is_negotiated(client, web_dir):
+    response = client.get("/index.html", headers={"Accept-Encoding": "gzip, deflate"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Content-Type"].startswith("text/html")
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert gzip.decompress(response.data) == INDEX
+
+    plain = client.get("/index.html")
+    assert "Content-Encoding" not in plain.headers
+    assert plain.data == INDEX
+    assert plain.headers["ETag"] != response.headers["ETag"]
+
+def test_matching_etag_gets_304(client, web_dir):
+    first = client.get("/favicon.png")
+    second = client.get("/favicon.png", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
+    assert second.data == b""
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+def test_only_versioned_urls_are_immutable(client, web_dir):
+    assert client.get("/favicon.png").headers["Cache-Control"] == "no-cache"
+    assert "immutable" in client.get("/favicon.png?v=abc123").headers["Cache-Control"]
+    assert client.get("/favicon.png?v=stale").headers["Cache-Control"] == "no-cache"
+
+def test_missing_and_escaping_paths_are_404(client, web_dir):
+    assert client.get("/nope.js").status_code == 404
+    assert client.get("/game-assets/../app.py").status_code == 404
+
+def test_manifest_describes_build(web_dir):
+    manifest = BuildManifest.scan(str(web_dir))
+    assert manifest.build_id == "abc123"
+    assert sorted(manifest.entries) == ["favicon.png", "index.html"]
+    assert manifest.get("index.html").variants == {"gzip": ".gz"}
+    assert manifest.summary()["bytes"] == len(INDEX) + 2048
+
+def test_404s_do_not_touch_the_disk(client, web_dir, monkeypatch):
+    build_assets.manifests.recheck_interval = 60
+    client.get("/index.html")
+    with monkeypatch.context() as m:
+        m.setattr(os, "stat", lambda path, **kw: pytest.fail("probed the disk"))
+        assert client.get("/wp-login.php").status_code == 404
+    assert client.get("/favicon.png").status_code == 200
+
+def test_manifest_follows_build_swap(client, web_dir, tmp_path):
+    assert client.get("/index.html").headers["X-Build-Id"] == "abc123"
+
+    make_build(tmp_path, "def456")
+    tmp_link = tmp_path / "web.tmp"
+    tmp_link.symlink_to(os.path.join("cache", "def456"))
+    os.replace(tmp_link, web_dir)
+
+    assert client.get("/index.html").headers["X-Build-Id"] == "def456"
+    assert client.get("/build-game/live").get_json()["build_id"] == "def456"
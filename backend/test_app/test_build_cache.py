@@ -0,0 +1,89 @@
+import sys
+import os
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import build_cache as build_cache_module
+from build_cache import BuildCache, fingerprint
+
+def make_game(tmp_path):
+    game_dir = tmp_path / "bird_game"
+    (game_dir / "assets").mkdir(parents=True)
+    (game_dir / "main.py").write_text("print('tweet')")
+    (game_dir / "assets" / "duckling.png").write_bytes(b"png")
+    return game_dir
+
+def fake_pygbag(calls):
+    def run_command(command):
+        def work(job):
+            calls.append(command)
+            web = os.path.join(command[-1], "build", "web")
+            os.makedirs(web)
+            with open(os.path.join(web, "index.html"), "w") as f:
+                f.write(f"build {len(calls)}")
+        return work
+    return run_command
+
+def make_cache(tmp_path, monkeypatch, calls):
+    monkeypatch.setattr(build_cache_module, "run_command", fake_pygbag(calls))
+    game_dir = make_game(tmp_path)
+    build_dir = game_dir / "build"
+    return BuildCache(str(game_dir), str(build_dir), str(build_dir / "web")), game_dir
+
+def test_fingerprint_tracks_sources_but_not_build_output(tmp_path):
+    game_dir = make_game(tmp_path)
+    before = fingerprint(str(game_dir))
+
+    (game_dir / "build").mkdir()
+    (game_dir / "build" / "index.html").write_text("output")
+    assert fingerprint(str(game_dir)) == before
+
+    (game_dir / "assets" / "duckling.png").write_bytes(b"new png")
+    assert fingerprint(str(game_dir)) != before
+
+def test_unchanged_tree_reuses_cached_build(tmp_path, monkeypatch):
+    calls = []
+    cache, game_dir = make_cache(tmp_path, monkeypatch, calls)
+    job = SimpleNamespace(log_line=lambda line: None)
+
+    cache.build(job)
+    message = cache.build(job)
+
+    assert len(calls) == 1
+    assert message.startswith("Game unchanged")
+    assert os.path.islink(cache.web_dir)
+    assert (game_dir / "build" / "web" / "index.html").read_text() == "build 1"
+    assert not os.listdir(cache.staging_dir)
+
+def test_new_build_is_swapped_in(tmp_path, monkeypatch):
+    calls = []
+    cache, game_dir = make_cache(tmp_path, monkeypatch, calls)
+    job = SimpleNamespace(log_line=lambda line: None)
+    cache.build(job)
+    first = cache.active()
+
+    (game_dir / "main.py").write_text("print('chirp')")
+    cache.build(job)
+
+    assert cache.active() != first
+    assert (game_dir / "build" / "web" / "index.html").read_text() == "build 2"
+
+def test_legacy_web_dir_is_replaced(tmp_path, monkeypatch):
+    calls = []
+    cache, game_dir = make_cache(tmp_path, monkeypatch, calls)
+    legacy = game_dir / "build" / "web"
+    legacy.mkdir(parents=True)
+    (legacy / "index.html").write_text("old")
+
+    cache.build(SimpleNamespace(log_line=lambda line: None))
+
+    assert os.path.islink(cache.web_dir)
+    assert not any(name.startswith("web.legacy-") for name in os.listdir(game_dir / "build"))
+
+def test_prune_keeps_live_build(tmp_path):
+    cache = BuildCache(str(tmp_path), str(tmp_path / "build"), str(tmp_path / "build" / "web"), keep=1)
+    for digest in ("a", "b", "c"):
+        os.makedirs(os.path.join(cache.cache_dir, digest))
+    cache.prune(keep_digest="b")
+    assert os.listdir(cache.cache_dir) == ["b"]
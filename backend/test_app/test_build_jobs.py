@@ -0,0 +1,85 @@
+import sys
+import os
+import threading
+import time
+from bson.objectid import ObjectId
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import app as app_module
+from app import app
+from build_jobs import BuildManager, run_command
+
+def wait_for(manager, job_id, status, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        state = manager.get(job_id)
+        if state and state["status"] == status:
+            return state
+        time.sleep(0.01)
+    raise AssertionError(f"job never reached {status}: {manager.get(job_id)}")
+
+def test_concurrent_submits_join_running_build(tmp_path):
+    release = threading.Event()
+    runs = []
+
+    def work(job):
+        runs.append(job.id)
+        release.wait(5)
+
+    manager = BuildManager(str(tmp_path), work)
+    first, created = manager.submit()
+    second, created_again = manager.submit()
+
+    assert created and not created_again
+    assert second["job_id"] == first["job_id"]
+
+    release.set()
+    wait_for(manager, first["job_id"], "succeeded")
+    assert len(runs) == 1
+    assert not os.path.exists(manager.lock_path)
+
+    third, created = manager.submit()
+    assert created and third["job_id"] != first["job_id"]
+    wait_for(manager, third["job_id"], "succeeded")
+
+def test_failed_build_reports_message(tmp_path):
+    def work(job):
+        job.log_line("compiling...")
+        raise RuntimeError("boom")
+
+    manager = BuildManager(str(tmp_path), work)
+    job, _ = manager.submit()
+    state = wait_for(manager, job["job_id"], "failed")
+    assert state["message"] == "Build failed: boom"
+    assert state["log"] == ["compiling..."]
+
+def test_stale_lock_is_cleared(tmp_path):
+    manager = BuildManager(str(tmp_path), lambda job: None, stale_after=0)
+    (tmp_path / "current.lock").write_text("deadbeef")
+    manager.write_state("deadbeef", {"job_id": "deadbeef", "status": "running", "pid": os.getpid()})
+
+    job, created = manager.submit()
+    assert created and job["job_id"] != "deadbeef"
+
+def test_run_command_streams_output(tmp_path):
+    manager = BuildManager(str(tmp_path), run_command([sys.executable, "-c", "print('step 1'); print('step 2')"]))
+    job, _ = manager.submit()
+    state = wait_for(manager, job["job_id"], "succeeded")
+    assert state["log"][-2:] == ["step 1", "step 2"]
+    assert state["progress"] == "step 2"
+
+def test_build_routes(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module, "build_manager", BuildManager(str(tmp_path), lambda job: None))
+    with app.test_client() as client:
+        with client.session_transaction() as sess:
+            sess['user_id'] = str(ObjectId())
+
+        response = client.post('/build-game')
+        assert response.status_code == 202
+        data = response.get_json()
+
+        wait_for(app_module.build_manager, data["job_id"], "succeeded")
+        status = client.get(data["status_url"]).get_json()
+        assert status["status"] == "succeeded"
+        assert client.get('/build-game/unknown').status_code == 404
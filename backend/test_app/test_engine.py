@@ -0,0 +1,119 @@
+import pytest
+
+from bird_game import engine
+from bird_game.engine import GameState
+
+def make_birds(chances):
+    return [engine.Bird(f"Bird {i}", None, 1, chance, "common") for i, chance in enumerate(chances)]
+
+SPAWN_POINTS = [(0, 0), (10, 0), (20, 0), (30, 0)]
+
+def test_spawn_sampler_is_reproducible_with_seed():
+    birds = make_birds([0.3] * 10)
+    first = engine.SpawnSampler(birds, start=0, seed=42)
+    second = engine.SpawnSampler(birds, start=0, seed=42)
+    for now in range(1, 20):
+        assert first.sample(first.due(now), SPAWN_POINTS) == second.sample(second.due(now), SPAWN_POINTS)
+
+def test_spawn_sampler_respects_chances_and_free_points():
+    sampler = engine.SpawnSampler(make_birds([1.0, 0.0, 1.0]), start=0, seed=1)
+    spawns = sampler.sample(1, SPAWN_POINTS)
+    assert [bird.name for bird, _ in spawns] == ["Bird 0", "Bird 2"]
+    assert len({pos for _, pos in spawns}) == 2
+
+    assert len(sampler.sample(5, SPAWN_POINTS[:3])) == 3
+    assert sampler.sample(5, []) == []
+
+def test_spawn_sampler_catches_up_after_stall():
+    sampler = engine.SpawnSampler(make_birds([0.5]), start=0, seed=3, max_catch_up=10)
+    assert sampler.due(0.5) == 0
+    assert sampler.due(3.7) == 3
+    assert sampler.last_check == 3
+    assert sampler.due(1000) == 10
+    assert sampler.last_check == 1000
+
+def test_spawn_sampler_follows_new_chances():
+    sampler = engine.SpawnSampler(make_birds([0.0]), start=0, seed=5)
+    assert sampler.sample(50, SPAWN_POINTS) == []
+    sampler.set_birds(make_birds([1.0]))
+    assert len(sampler.sample(1, SPAWN_POINTS)) == 1
+
+def test_apply_decoration_updates_only_its_tier():
+    tiers = {"common": {"spawn_chance": 0.10}, "uncommon": {"spawn_chance": 0.033}}
+    birds = [engine.Bird("Duckling", None, 0.6, 0.10, "common"), engine.Bird("Crow", None, 3, 0.033, "uncommon")]
+    sampler = engine.SpawnSampler(birds, start=0)
+
+    changed = engine.apply_decoration("Clock", tiers, birds)
+    sampler.set_tier_chances(changed)
+
+    assert changed == {"uncommon": 0.04}
+    assert tiers["uncommon"]["spawn_chance"] == 0.04
+    assert [bird.spawn_chance for bird in birds] == [0.10, 0.04]
+    assert list(sampler.chances) == [0.10, 0.04]
+    assert engine.apply_decoration("Gnome Statue", tiers, birds) == {}
+
+def test_every_store_decoration_has_an_effect():
+    assert set(engine.DECORATION_EFFECTS) == {"Lamp", "Bath", "Clock", "Froggy Fountain", "Sofa"}
+
+def test_collection_counts_species_and_income():
+    collection = engine.Collection()
+    duckling = engine.Bird("Duckling", None, 0.6, 0.1, "common")
+    owl = engine.Bird("Owl", None, 3, 0.03, "uncommon")
+
+    species = collection.species
+    for bird in (duckling, duckling, owl):
+        collection.add(bird)
+
+    assert collection.counts == {"Duckling": 2, "Owl": 1}
+    assert collection.income_per_minute == pytest.approx(4.2)
+    assert len(collection) == 3
+    assert "Owl" in collection and "Owl" in species
+    assert set(species) == {"Duckling", "Owl"}
+
+def test_game_state_is_reproducible():
+    first, second = GameState(seed=11), GameState(seed=11)
+    for _ in range(600):
+        assert [(b.name, pos) for b, pos in first.tick(1)] == [(b.name, pos) for b, pos in second.tick(1)]
+
+def test_game_state_spawns_onto_free_points_and_collects():
+    state = GameState(make_birds([1.0]), seed=2, spawn_points=SPAWN_POINTS[:2])
+    assert state.tick(0.5) == []
+    spawns = state.tick(0.5)
+    assert len(spawns) == 1
+    bird, pos = spawns[0]
+    assert state.perched == {pos: bird}
+
+    assert state.collect(pos) is bird
+    assert state.collect(pos) is None
+    assert state.collection.counts == {"Bird 0": 1}
+
+def test_game_state_pays_income_per_tick():
+    state = GameState(make_birds([0.0]), seed=0)
+    state.collection.add(engine.Bird("Owl", None, 3, 0, "uncommon"))
+    state.tick(10)
+    assert state.gold == pytest.approx(30)
+
+def test_game_state_purchase_applies_effects_once():
+    state = GameState(seed=0, gold=150)
+    assert state.purchase("Lamp")
+    assert state.gold == 50
+    assert state.rarity_tiers["common"]["spawn_chance"] == 0.05
+    assert engine.RARITY_TIERS["common"]["spawn_chance"] == 0.10
+    duckling = state.bird_types.index(next(b for b in state.bird_types if b.name == "Duckling"))
+    assert state.spawner.chances[duckling] == 0.05
+
+    assert not state.purchase("Lamp")
+    assert not state.purchase("Bath")
+    assert not state.purchase("Disco Ball")
+    assert state.purchased == {"Lamp"}
+
+def test_simulate_fast_forwards_hours():
+    from bird_game.simulate import simulate, summarize
+    state, purchases = simulate(2, seed=4, collect_every=60)
+    assert state.now == pytest.approx(7200)
+    assert len(state.collection) > 0
+    assert [p["deco"] for p in purchases][:1] == ["Lamp"]
+
+    again, _ = simulate(2, seed=4, collect_every=60)
+    assert again.gold == state.gold
+    assert summarize(state, purchases, 0.0)["birds_caught"] == len(state.collection)
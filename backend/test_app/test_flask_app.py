@@ -45,3 +45,53 @@ def test_build_game_requires_login(client):
     response = client.post('/build-game')
     assert response.status_code == 401
     assert b"Not logged in" in response.data
+
+class FakeUsers:
+    """In-memory users collection that enforces the unique username index."""
+    def __init__(self):
+        self.docs = {}
+        self.indexes = []
+
+    def create_index(self, key, **kwargs):
+        self.indexes.append((key, kwargs))
+
+    def update_many(self, query, update):
+        from types import SimpleNamespace
+        return SimpleNamespace(modified_count=0)
+
+    def insert_one(self, doc):
+        from pymongo.errors import DuplicateKeyError
+        if doc['username'] in self.docs:
+            raise DuplicateKeyError("E11000 duplicate key error")
+        self.docs[doc['username']] = dict(doc, _id="0123456789abcdef01234567")
+
+    def find_one(self, query, projection=None):
+        doc = self.docs.get(query.get('username'))
+        if doc and projection:
+            return {k: v for k, v in doc.items() if k == '_id' or k in projection}
+        return doc
+
+@pytest.fixture
+def fake_users(monkeypatch):
+    import app as app_module
+    from types import SimpleNamespace
+    users = FakeUsers()
+    monkeypatch.setattr(app_module, "mongo", SimpleNamespace(db=SimpleNamespace(users=users)))
+    return users
+
+def test_ensure_indexes_creates_unique_username(fake_users):
+    from app import ensure_indexes
+    ensure_indexes()
+    assert fake_users.indexes == [("username", {"unique": True, "name": "username_unique"})]
+
+def test_register_duplicate_username(client, fake_users):
+    client.post('/register', data={'username': 'robin', 'password': 'pw'})
+    response = client.post('/register', data={'username': 'robin', 'password': 'pw'}, follow_redirects=True)
+    assert b"Username already exists." in response.data
+    assert len(fake_users.docs) == 1
+
+def test_login_after_register(client, fake_users):
+    client.post('/register', data={'username': 'robin', 'password': 'pw'})
+    response = client.post('/login', data={'username': 'robin', 'password': 'pw'})
+    assert response.status_code == 302
+    assert '/dashboard' in response.headers['Location']
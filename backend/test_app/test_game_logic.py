@@ -3,6 +3,7 @@ import pytest
 import os
 from unittest import mock
 import bird_game.main as game_main
+from bird_game.engine import DECO_PRICES, DECORATION_EFFECTS
 import asyncio
 
 @pytest.fixture(autouse=True)
@@ -32,6 +33,20 @@ def test_draw_error_messages(monkeypatch):
 
     game_main.draw_error_messages(screen, font)
 
+def test_text_cache_reuses_and_evicts():
+    font = pygame.font.SysFont("Arial", 18)
+    cache = game_main.TextCache(max_entries=2)
+
+    gold = cache.render(font, "Gold: 1", (255, 255, 0))
+    assert cache.render(font, "Gold: 1", (255, 255, 0)) is gold
+    assert cache.render(font, "Gold: 1", (255, 0, 0)) is not gold
+    cache.render(font, "Gold: 1", (255, 255, 0))
+    cache.render(font, "Gold: 2", (255, 255, 0))
+
+    assert (font, "Gold: 1", (255, 0, 0), True) not in cache.surfaces
+    assert (font, "Gold: 1", (255, 255, 0), True) in cache.surfaces
+    assert (cache.hits, cache.misses) == (2, 3)
+
 def test_remove_error_message():
     game_main.error_messages.clear()
     game_main.add_error_message("Some error")
@@ -53,6 +68,119 @@ def test_greyscale_surface_fail():
         result = game_main.greyscale_surface(surface)
         assert result == surface  # Should return the original
 
+def test_greyscale_cache_precomputes_on_load(tmp_path):
+    path = tmp_path / "bird.png"
+    pygame.image.save(pygame.Surface((100, 100)), str(path))
+    cache = game_main.GreyscaleCache()
+    convert = mock.Mock(wraps=game_main.greyscale_surface)
+
+    with mock.patch.object(game_main, "greyscale_surface", convert):
+        sprite = cache.store(str(path), game_main.load_scaled_image(str(path), 50))
+        grey = cache.get(sprite)
+        assert cache.get(sprite) is grey
+    assert convert.call_count == 1
+    assert (str(path), (50, 50)) in cache.entries
+
+def test_greyscale_cache_evicts_on_reload():
+    cache = game_main.GreyscaleCache()
+    old = cache.store("bird.png", pygame.Surface((50, 50)))
+    new = cache.store("bird.png", pygame.Surface((40, 40)))
+
+    assert list(cache.entries) == [("bird.png", (40, 40))]
+    assert cache.get(new).get_size() == (40, 40)
+    assert id(old) not in cache.by_surface
+
+def test_greyscale_cache_converts_unknown_surface_once():
+    cache = game_main.GreyscaleCache()
+    surface = pygame.Surface((10, 10))
+    assert cache.get(surface) is cache.get(surface)
+
+def test_thumbnail_atlas_index():
+    red = pygame.Surface((80, 40))
+    red.fill((255, 0, 0))
+    blue = pygame.Surface((20, 20))
+    blue.fill((0, 0, 255))
+    atlas = game_main.ThumbnailAtlas({"Red": red, "Blue": blue}, columns=3)
+
+    assert atlas.surface.get_size() == (150, 100)
+    colour_rects = [atlas.rects[name][0] for name in ("Red", "Blue")]
+    grey_rects = [atlas.rects[name][1] for name in ("Red", "Blue")]
+    assert len({tuple(r) for r in colour_rects + grey_rects}) == 4
+
+    target = pygame.Surface((50, 50))
+    atlas.blit(target, "Red", (0, 0))
+    assert target.get_at((25, 25))[:3] == (255, 0, 0)
+    atlas.blit(target, "Red", (0, 0), grey=True)
+    r, g, b = target.get_at((25, 25))[:3]
+    assert r == g == b
+
+@pytest.mark.asyncio
+async def test_show_store_does_not_scale_per_frame(monkeypatch):
+    screen = pygame.Surface((800, 600))
+    deco_assets = {"Lamp": pygame.Surface((50, 50))}
+    atlas = game_main.ThumbnailAtlas(deco_assets)
+    scale = mock.Mock(side_effect=pygame.transform.scale)
+    monkeypatch.setattr(pygame.transform, "scale", scale)
+
+    scroll_event = pygame.event.Event(pygame.MOUSEWHEEL, {"y": -1})
+    back_event = pygame.event.Event(pygame.MOUSEBUTTONDOWN, {"pos": (790, 30)})
+    monkeypatch.setattr(pygame, "event", mock.Mock(get=mock.Mock(side_effect=[[scroll_event], [back_event], []])))
+    monkeypatch.setattr(pygame.display, "flip", lambda: None)
+
+    await game_main.show_store(screen, set(), 0, deco_assets, {"Lamp": 100}, {"Lamp": (0, 0)}, mock.Mock(), atlas=atlas)
+    assert scale.call_count == 0
+
+def test_scrolling_list_only_exposes_visible_rows():
+    rows = game_main.ScrollingList(100)
+    assert rows.visible_rows() == range(0, 9)
+    assert rows.row_y(0) == 80
+
+    assert rows.scroll(-10)
+    assert rows.scroll_offset == 300
+    visible = rows.visible_rows()
+    assert rows.row_y(visible[0]) + rows.item_height > 0
+    assert rows.row_y(visible[-1]) < game_main.SCREEN_HEIGHT
+    assert len(visible) <= game_main.SCREEN_HEIGHT // rows.item_height + 1
+
+    assert rows.row_at((50, rows.row_y(7) + 5)) == 7
+    assert rows.row_at((10, rows.row_y(7) + 5)) is None
+
+def test_scrolling_list_clamps_scroll():
+    rows = game_main.ScrollingList(3)
+    assert not rows.scroll(-5)
+    assert rows.scroll_offset == 0
+    assert rows.visible_rows() == range(0, 3)
+
+@pytest.mark.asyncio
+async def test_show_birdiary_skips_unchanged_frames(monkeypatch):
+    screen = pygame.Surface((800, 600))
+    bird_types = [game_main.Bird(f"Bird {i}", pygame.Surface((10, 10)), 10, 0.1, "common") for i in range(40)]
+    game_main.error_messages.clear()
+
+    scroll_event = pygame.event.Event(pygame.MOUSEWHEEL, {"y": -1})
+    back_event = pygame.event.Event(pygame.MOUSEBUTTONDOWN, {"pos": (790, 30)})
+    monkeypatch.setattr(pygame, "event", mock.Mock(get=mock.Mock(side_effect=[[], [], [scroll_event], [], [back_event]])))
+    flip = mock.Mock()
+    monkeypatch.setattr(pygame.display, "flip", flip)
+
+    assert await game_main.show_birdiary(screen, set(), bird_types)
+    assert flip.call_count == 2
+
+@pytest.mark.asyncio
+async def test_list_screens_reuse_rendered_text_across_visits(monkeypatch):
+    screen = pygame.Surface((800, 600))
+    bird_types = [game_main.Bird(f"Bird {i}", pygame.Surface((10, 10)), 10, 0.1, "common") for i in range(5)]
+    game_main.error_messages.clear()
+    back_event = pygame.event.Event(pygame.MOUSEBUTTONDOWN, {"pos": (game_main.SCREEN_WIDTH - 70, 35)})
+    monkeypatch.setattr(pygame, "event", mock.Mock(get=mock.Mock(return_value=[back_event])))
+    monkeypatch.setattr(pygame.display, "flip", lambda: None)
+    fonts = game_main.ListFonts()
+
+    await game_main.show_birdiary(screen, set(), bird_types, fonts=fonts)
+    misses = game_main.text_cache.misses
+    await game_main.show_birdiary(screen, set(), bird_types, fonts=fonts)
+    assert game_main.text_cache.misses == misses
+
 def test_load_scaled_image_success(tmp_path):
     """Test loading and scaling an image"""
     test_img_path = tmp_path / "test_image.png"
@@ -71,6 +199,72 @@ def test_load_scaled_image_fail():
     assert isinstance(loaded, pygame.Surface)
     assert loaded.get_width() == 50
 
+def test_scene_renderer_pushes_only_dirty_rects(monkeypatch):
+    flip = mock.Mock()
+    update = mock.Mock()
+    monkeypatch.setattr(pygame.display, "flip", flip)
+    monkeypatch.setattr(pygame.display, "update", update)
+
+    screen = pygame.Surface((800, 600))
+    background = pygame.Surface((800, 600))
+    background.fill((0, 100, 0))
+    bird = pygame.Surface((20, 20))
+    bird.fill((255, 0, 0))
+    scene = game_main.SceneRenderer(screen, background)
+    scene.set("gold", pygame.Surface((50, 20)), (10, 10), layer=game_main.UI_LAYER)
+
+    assert scene.present()
+    assert flip.call_count == 1 and update.call_count == 0
+
+    scene.set("gold", scene.sprites["gold"][1], (10, 10), layer=game_main.UI_LAYER)
+    assert not scene.present()
+
+    scene.set(("bird", (100, 100)), bird, (100, 100))
+    assert scene.present()
+    assert update.call_args[0][0] == [pygame.Rect(100, 100, 20, 20)]
+    assert screen.get_at((105, 105))[:3] == (255, 0, 0)
+
+    scene.remove(("bird", (100, 100)))
+    scene.present()
+    assert screen.get_at((105, 105))[:3] == (0, 100, 0)
+
+    scene.invalidate()
+    scene.present()
+    assert flip.call_count == 2
+
+def test_frame_governor_drops_to_idle_rate():
+    now = {"t": 0.0}
+    governor = game_main.FrameGovernor(active_fps=30, idle_fps=4, idle_after=5, clock=lambda: now["t"])
+    assert governor.fps() == 30
+
+    now["t"] = 5.0
+    assert governor.idle()
+    assert governor.fps() == 4
+
+    governor.activity()
+    assert governor.fps() == 30
+
+@pytest.mark.asyncio
+async def test_frame_governor_wakes_on_input(monkeypatch):
+    governor = game_main.FrameGovernor(active_fps=30, idle_fps=0.5, idle_after=0)
+    frame_clock = mock.Mock()
+    peek = mock.Mock(side_effect=[False, True])
+    monkeypatch.setattr(pygame.event, "peek", peek)
+
+    await asyncio.wait_for(governor.wait(frame_clock), timeout=1)
+
+    assert peek.call_count == 2
+    frame_clock.tick.assert_called_once_with()
+    governor.idle_after = 5
+    assert governor.fps() == 30
+
+@pytest.mark.asyncio
+async def test_frame_governor_ticks_at_full_rate_when_active():
+    governor = game_main.FrameGovernor(active_fps=30)
+    frame_clock = mock.Mock()
+    await governor.wait(frame_clock)
+    frame_clock.tick.assert_called_once_with(30)
+
 def test_bird_init():
     """Simple test for Bird initialization"""
     img = pygame.Surface((10, 10))
@@ -82,6 +276,50 @@ def test_bird_init():
     assert bird.spawn_chance == 0.1
     assert bird.rarity == "common"
 
+def make_sprite_bird(name="Robin"):
+    image = pygame.Surface((40, 40), pygame.SRCALPHA)
+    pygame.draw.rect(image, (200, 50, 50, 255), (10, 10, 20, 20))  # transparent 10px border
+    return game_main.Bird(name, image, 1, 0.1, "common")
+
+def test_perch_index_hits_only_opaque_pixels():
+    bird = make_sprite_bird()
+    perched = {}
+    perches = game_main.PerchIndex([(100, 100), (300, 100)], perched)
+    perches.prepare([bird.image])
+    perched[(100, 100)] = bird
+
+    assert perches.hit((120, 120)) == (100, 100)
+    assert perches.hit((102, 102)) is None  # transparent corner
+    assert perches.hit((320, 120)) is None
+
+def test_perch_index_follows_game_state():
+    bird = make_sprite_bird()
+    state = game_main.GameState([bird], spawn_points=[(100, 100)])
+    perches = game_main.PerchIndex(state.spawn_points, state.perched)
+    perches.prepare([bird.image])
+
+    state.perched[(100, 100)] = bird
+    assert perches.hit((120, 120)) == (100, 100)
+    assert state.collect((100, 100)) is bird
+    assert perches.hit((120, 120)) is None
+
+def test_perch_index_prefers_the_latest_spawn():
+    bird = make_sprite_bird()
+    perched = {}
+    perches = game_main.PerchIndex([(100, 100), (110, 110)], perched)
+    perches.prepare([bird.image])
+    perched[(110, 110)] = bird
+    perched[(100, 100)] = bird
+
+    assert perches.hit((125, 125)) == (100, 100)
+
+def test_perch_index_reuses_sprite_masks():
+    perches = game_main.PerchIndex([(0, 0), (100, 0)], {})
+    bird = make_sprite_bird()
+    perches.prepare([bird.image, bird.image])
+    assert len(perches.masks) == 1
+    assert perches.grid[(2, 0)] == [(100, 0)]
+
 @pytest.mark.asyncio
 async def test_show_birdiary(monkeypatch):
     screen = pygame.Surface((800, 600))
@@ -304,13 +542,21 @@ async def test_main_purchase_all_decor(monkeypatch):
 
     decorations_to_buy = ["Lamp", "Bath", "Clock", "Froggy Fountain", "Sofa"]
     purchase_index = {"index": 0}
+    states = []
+    real_game_state = game_main.GameState
 
-    async def fake_show_store(screen, purchased_set, gold, deco_assets, deco_prices, deco_spawn_points, deco_click_sound):
+    def rich_game_state(*args, **kwargs):
+        states.append(real_game_state(*args, gold=sum(DECO_PRICES.values()), **kwargs))
+        return states[-1]
+
+    async def fake_show_store(screen, purchased_set, gold, deco_assets, deco_prices, deco_spawn_points, deco_click_sound, atlas=None, purchase=None, fonts=None):
         if purchase_index["index"] < len(decorations_to_buy):
-            purchased_set.add(decorations_to_buy[purchase_index["index"]])
+            assert purchase(decorations_to_buy[purchase_index["index"]])
             purchase_index["index"] += 1
         return True, gold
 
+    monkeypatch.setattr(game_main, "GameState", rich_game_state)
+
     monkeypatch.setattr(game_main, "show_store", fake_show_store)
     monkeypatch.setattr(game_main, "show_birdiary", mock.AsyncMock(return_value=True))
 
@@ -323,4 +569,12 @@ async def test_main_purchase_all_decor(monkeypatch):
 
     await game_main.main()
 
+    (state,) = states
+    assert state.purchased == set(decorations_to_buy)
+    assert state.gold == 0
+    for effects in DECORATION_EFFECTS.values():
+        for rarity, chance in effects.items():
+            assert state.rarity_tiers[rarity]["spawn_chance"] == chance
+            assert all(bird.spawn_chance == chance for bird in state.bird_types if bird.rarity == rarity)
+
 
@@ -0,0 +1,87 @@
+import sys
+import os
+import argparse
+import threading
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import loadtest
+from loadtest import Gunicorn, Recorder, VirtualUser, int_list, latency_percentiles, run_load
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+def fake_backend(environ, start_response):
+    """Just enough of the app: login sets a cookie and redirects, the game pages need it"""
+    path = environ["PATH_INFO"]
+    logged_in = "session=ok" in environ.get("HTTP_COOKIE", "")
+    if path in ("/register", "/login"):
+        headers = [("Location", "/dashboard")]
+        if path == "/login":
+            headers.append(("Set-Cookie", "session=ok; Path=/"))
+        start_response("302 Found", headers)
+        return [b""]
+    if path.startswith("/game-assets/"):
+        start_response("404 Not Found", [])
+        return [b"File not found"]
+    if not logged_in:
+        start_response("302 Found", [("Location", "/login")])
+        return [b""]
+    start_response("200 OK", [("Content-Type", "text/html")])
+    return [b"<html>birds</html>"]
+
+@pytest.fixture
+def base_url():
+    server = make_server("127.0.0.1", 0, fake_backend, handler_class=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+def test_flow_times_each_route_without_following_redirects(base_url):
+    recorder = Recorder()
+    VirtualUser(base_url, recorder, "bird_game.apk").flow(pages=2)
+
+    assert recorder.statuses["register"] == {302: 1}
+    assert recorder.statuses["login"] == {302: 1}
+    # The session cookie from /login was sent with the game pages
+    assert recorder.statuses["dashboard"] == {200: 2}
+    assert recorder.statuses["birds"] == {200: 2}
+    assert recorder.statuses["asset"] == {404: 2}
+
+def test_run_load_reports_throughput_and_errors(base_url):
+    result = run_load(base_url, users=2, duration=0.2, pages=1, asset="missing.apk")
+
+    routes = result["routes"]
+    assert set(routes) == set(loadtest.ROUTES)
+    assert result["requests"] == sum(route["requests"] for route in routes.values())
+    assert routes["dashboard"]["errors"] == 0
+    assert routes["asset"]["errors"] == routes["asset"]["requests"]
+    assert routes["birds"]["p50_ms"] <= routes["birds"]["p99_ms"]
+
+def test_unreachable_server_counts_as_status_zero():
+    recorder = Recorder()
+    user = VirtualUser(f"http://127.0.0.1:{loadtest.free_port()}", recorder, "x", timeout=1)
+    assert user.request("dashboard", "/dashboard") == 0
+    assert recorder.summary(1.0)["dashboard"]["errors"] == 1
+
+def test_latency_percentiles():
+    stats = latency_percentiles([i / 1000 for i in range(1, 101)])
+    assert stats == {"p50_ms": 50.5, "p95_ms": 95.05, "p99_ms": 99.01}
+    assert latency_percentiles([0.002]) == {"p50_ms": 2.0, "p95_ms": 2.0, "p99_ms": 2.0}
+
+def test_sweep_arguments():
+    assert int_list("1,2, 4") == [1, 2, 4]
+    for bad in ("", "0,2", "two"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            int_list(bad)
+
+def test_gunicorn_gets_sweep_settings():
+    server = Gunicorn(3, 8, "mongodb://127.0.0.1:1/loadtest", log=None)
+    assert server.env["GUNICORN_PROCESSES"] == "3"
+    assert server.env["GUNICORN_THREADS"] == "8"
+    assert server.env["GUNICORN_BIND"] == f"127.0.0.1:{server.port}"
+    assert server.env["MONGO_URI"] == "mongodb://127.0.0.1:1/loadtest"
@@ -0,0 +1,113 @@
+import sys
+import os
+from types import SimpleNamespace
+import pytest
+from flask import Flask
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+import metrics
+from metrics import MetricsRegistry, MongoCommandListener, archive_worker, counter, gauge, instrument, merge, render
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+def sample_lines(text, name):
+    return [line for line in text.splitlines() if line.startswith(name)]
+
+def test_requests_are_timed_per_endpoint(client):
+    client.get("/login")
+    client.get("/no/such/page.php")
+    client.delete("/dashboard")
+    body = client.get("/metrics").get_data(as_text=True)
+
+    login = 'blueprint="auth",endpoint="auth.login",method="GET",status="200"'
+    assert f'birdgame_http_request_duration_seconds_bucket{{{login},le="+Inf"}}' in body
+    assert f"birdgame_http_request_duration_seconds_count{{{login}}}" in body
+    # Paths never become labels: unknown files go to the catch-all route, bad methods to "unmatched"
+    assert 'endpoint="game.serve_root_files",method="GET",status="404"' in body and "no/such" not in body
+    assert 'blueprint="",endpoint="unmatched",method="DELETE",status="405"' in body
+    assert 'birdgame_http_response_size_bytes_count{blueprint="auth",endpoint="auth.login"}' in body
+    # The scrape itself is in flight
+    assert "birdgame_http_requests_in_flight 1" in body
+    assert sample_lines(body, "birdgame_password_hash_completed_total")
+    assert sample_lines(body, "birdgame_write_buffer_pending_users")
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    for seconds in (0.003, 0.02, 0.02, 30):
+        registry.request_seconds.observe(seconds, "game", "game.birds", "GET", "200")
+    body = render(registry.snapshot())
+
+    prefix = 'birdgame_http_request_duration_seconds_bucket{blueprint="game",endpoint="game.birds",method="GET",status="200",'
+    assert f'{prefix}le="0.005"}} 1' in body
+    assert f'{prefix}le="0.025"}} 3' in body
+    assert f'{prefix}le="10.0"}} 3' in body
+    assert f'{prefix}le="+Inf"}} 4' in body
+    assert 'birdgame_http_request_duration_seconds_sum{blueprint="game",endpoint="game.birds",method="GET",status="200"} 30.043' in body
+
+def test_mongo_listener_times_commands():
+    registry = MetricsRegistry()
+    listener = MongoCommandListener(registry)
+    listener.succeeded(SimpleNamespace(command_name="find", duration_micros=1500))
+    listener.failed(SimpleNamespace(command_name="update", duration_micros=200000))
+    body = render(registry.snapshot())
+
+    assert 'birdgame_mongodb_command_duration_seconds_count{command="find",outcome="success"} 1' in body
+    assert 'birdgame_mongodb_command_duration_seconds_bucket{command="update",outcome="failure",le="0.1"} 0' in body
+    assert 'birdgame_mongodb_command_duration_seconds_bucket{command="update",outcome="failure",le="0.25"} 1' in body
+
+def test_workers_are_added_up_and_reaped_workers_keep_counters(tmp_path):
+    directory = str(tmp_path)
+    workers = [MetricsRegistry(directory=directory) for _ in range(2)]
+    for pid, registry in zip((101, 102), workers):
+        registry.in_flight = 2
+        registry.add_collector(lambda: [counter("flushed_ops_total", "Flushed", 5), gauge("slowest", "Max", 0.5 if pid == 101 else 0.2, agg="max")])
+        registry.mongo_seconds.observe(0.002, "find", "success")
+        metrics.write_json(os.path.join(directory, f"{pid}.json"), registry.snapshot())
+
+    merged = merge(metrics.read_json(os.path.join(directory, f"{pid}.json")) for pid in (101, 102))
+    body = render(merged)
+    assert "birdgame_flushed_ops_total 10" in body
+    assert "birdgame_http_requests_in_flight 4" in body
+    assert "birdgame_slowest 0.5" in body
+    assert 'birdgame_mongodb_command_duration_seconds_count{command="find",outcome="success"} 2' in body
+
+    archive_worker(directory, 101)
+    assert not os.path.exists(os.path.join(directory, "101.json"))
+    body = render(merge(metrics.read_json(os.path.join(directory, name)) for name in ("archive.json", "102.json")))
+    assert "birdgame_flushed_ops_total 10" in body
+    assert "birdgame_http_requests_in_flight 2" in body
+    assert 'birdgame_mongodb_command_duration_seconds_count{command="find",outcome="success"} 2' in body
+
+def test_scrape_merges_the_metrics_directory(tmp_path):
+    other = MetricsRegistry(directory=str(tmp_path))
+    other.add_collector(lambda: [counter("jobs_total", "Jobs", 3)])
+    metrics.write_json(str(tmp_path / "1.json"), other.snapshot())
+
+    flask_app = Flask(__name__)
+    registry = MetricsRegistry(directory=str(tmp_path), dump_interval=60)
+    registry.add_collector(lambda: [counter("jobs_total", "Jobs", 4)])
+    instrument(flask_app, registry)
+
+    response = flask_app.test_client().get("/metrics")
+    assert response.content_type == metrics.CONTENT_TYPE
+    assert "birdgame_jobs_total 7" in response.get_data(as_text=True)
+    assert os.path.exists(tmp_path / f"{os.getpid()}.json")
+
+def test_label_values_are_escaped():
+    body = render({"histograms": {}, "samples": [counter("x_total", "X", 1, path='a"b\\c\nd')]})
+    assert 'x_total{path="a\\"b\\\\c\\nd"} 1' in body
+
+def test_dump_thread_writes_final_snapshot_on_stop(tmp_path):
+    registry = MetricsRegistry(directory=str(tmp_path), dump_interval=60)
+    registry.start()
+    registry.request_seconds.observe(0.01, "game", "game.dashboard", "GET", "200")
+    registry.stop()
+
+    dumped = metrics.read_json(str(tmp_path / f"{os.getpid()}.json"))
+    assert dumped["histograms"]["birdgame_http_request_duration_seconds"]["series"][0][0] == ["game", "game.dashboard", "GET", "200"]
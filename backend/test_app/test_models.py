@@ -0,0 +1,114 @@
+import sys
+import os
+from types import SimpleNamespace
+from bson.objectid import ObjectId
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import UserRepository, QueryStats, offline_credit
+from profile_cache import ProfileCache
+from test_progress_sync import evaluate, run_pipeline
+
+class FakeUsers:
+    def __init__(self, docs=()):
+        self.docs = {doc["_id"]: doc for doc in docs}
+        self.queries = []
+
+    def find_one(self, query, projection):
+        self.queries.append(("find_one", query, projection))
+        doc = self.docs.get(query.get("_id"))
+        return doc and {"_id": doc["_id"], **{k: doc[k] for k in projection if k in doc}}
+
+    def update_one(self, query, update):
+        self.queries.append(("update_one", query, update))
+        return SimpleNamespace(matched_count=1)
+
+    def find_one_and_update(self, query, update, projection, return_document):
+        self.queries.append(("find_one_and_update", query, update))
+        doc = self.docs.get(query["_id"])
+        fields = {path.split(".")[0] for path in projection}
+        return doc and {"_id": doc["_id"], **{k: doc[k] for k in fields if k in doc}}
+
+    def update_many(self, query, pipeline):
+        self.queries.append(("update_many", query, pipeline))
+        matched = [doc for doc in self.docs.values() if evaluate(query["$expr"], doc)]
+        for doc in matched:
+            run_pipeline(doc, pipeline)
+        return SimpleNamespace(modified_count=len(matched))
+
+def make_repo(*docs):
+    collection = FakeUsers(docs)
+    return UserRepository(lambda: collection, cache=ProfileCache()), collection
+
+def test_get_dashboard_skips_password_and_birds():
+    user_id = ObjectId()
+    repo, collection = make_repo({"_id": user_id, "money": 7, "birds": [], "password": "hash", "last_seen": 5.0})
+
+    assert repo.get_dashboard(str(user_id)) == {"_id": user_id, "money": 7}
+    assert repo.get_dashboard(str(user_id)) == {"money": 7}
+    assert collection.queries == [("find_one", {"_id": user_id}, {"money": 1})]
+
+def test_apply_progress_invalidates_cache():
+    user_id = ObjectId()
+    repo, collection = make_repo({"_id": user_id, "money": 1})
+    repo.get_dashboard(user_id)
+
+    assert repo.apply_progress(user_id, "tab", 1, gold=5) == 0
+    repo.get_dashboard(user_id)
+
+    assert [q[0] for q in collection.queries] == ["find_one", "find_one_and_update", "find_one"]
+
+def test_query_stats_records_timings():
+    stats = QueryStats(slow_threshold=0)
+    repo = UserRepository(lambda: FakeUsers(), stats=stats)
+    repo.get_dashboard(ObjectId())
+    repo.get_dashboard(ObjectId())
+
+    snapshot = stats.snapshot()
+    assert snapshot["get_profile"]["count"] == 2
+    assert snapshot["get_profile"]["max_ms"] >= snapshot["get_profile"]["avg_ms"] >= 0
+
+def test_offline_credit_is_capped_and_skips_short_gaps():
+    user = {"last_seen": 1000.0, "income_rate": 0.5}
+    assert offline_credit(user, 1060.0, max_offline=3600, min_gap=120) == 0
+    assert offline_credit(user, 1600.0, max_offline=3600, min_gap=120) == 300
+    assert offline_credit(user, 100000.0, max_offline=3600, min_gap=120) == 1800
+    assert offline_credit({"income_rate": 0.5}, 100000.0, max_offline=3600, min_gap=120) == 0
+
+def test_migrate_income_rates_fixes_old_scale_only():
+    old, current, empty = ObjectId(), ObjectId(), ObjectId()
+    birds = [{"name": "Crow", "gold_per_minute": 3}, {"name": "Owl", "gold_per_minute": 6}]
+    repo, collection = make_repo(
+        {"_id": old, "birds": birds, "income_rate": 0.15},
+        {"_id": current, "birds": birds, "income_rate": 9},
+        {"_id": empty, "birds": []},
+    )
+
+    assert repo.migrate_income_rates() == 1
+    assert collection.docs[old]["income_rate"] == 9
+    assert repo.migrate_income_rates() == 0
+    assert "income_rate" not in collection.docs[empty]
+
+def test_apply_progress_tracks_income_rate_and_last_seen():
+    user_id = ObjectId()
+    repo, collection = make_repo()
+    repo.apply_progress(user_id, "tab", 4, gold=2, birds=[{"name": "Crow", "gold_per_minute": 3}], now=50.0)
+
+    _, query, pipeline = collection.queries[-1]
+    assert query == {"_id": user_id}
+    doc = {"money": 1, "last_seen": 10.0}
+    run_pipeline(doc, pipeline)
+    assert doc == {
+        "money": 3, "last_seen": 50.0, "income_rate": 3,
+        "birds": [{"name": "Crow", "gold_per_minute": 3}],
+        "sync_sessions": [{"id": "tab", "seqs": [4], "started": 50.0, "earned": 2, "at": 50.0}],
+    }
+
+def test_apply_progress_credits_only_the_first_batch_of_a_session():
+    user_id = ObjectId()
+    repo, collection = make_repo({"_id": user_id, "last_seen": 1000.0, "income_rate": 0.5})
+    assert repo.apply_progress(user_id, "tab", 1, now=2000.0, max_offline=3600, min_gap=120) == 500
+
+    collection.docs[user_id]["sync_sessions"] = [{"id": "tab", "seqs": [1], "at": 2000.0}]
+    assert repo.apply_progress(user_id, "tab", 2, now=2000.0, max_offline=3600, min_gap=120) == 0
+    assert repo.apply_progress(user_id, "tab", 1, now=2000.0, max_offline=3600, min_gap=120) is None
@@ -0,0 +1,106 @@
+import sys
+import os
+import threading
+import pytest
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import app as app_module
+from app import app
+from passwords import HasherBusy, PasswordHasher
+from test_flask_app import FakeUsers
+
+CHEAP = "pbkdf2:sha256:1000"
+
+class RehashUsers(FakeUsers):
+    def __init__(self):
+        super().__init__()
+        self.updated = threading.Event()
+
+    def update_one(self, query, update):
+        for doc in self.docs.values():
+            if str(doc['_id']) == str(query['_id']):
+                doc.update(update['$set'])
+        self.updated.set()
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+@pytest.fixture
+def fake_users(monkeypatch):
+    users = RehashUsers()
+    monkeypatch.setattr(app_module, "mongo", SimpleNamespace(db=SimpleNamespace(users=users)))
+    return users
+
+def test_hash_and_verify():
+    hasher = PasswordHasher(method=CHEAP)
+    pwhash = hasher.hash("pw")
+    assert pwhash.startswith(CHEAP + "$")
+    assert hasher.verify(pwhash, "pw")
+    assert not hasher.verify(pwhash, "nope")
+    assert hasher.stats()["completed"] == 3
+
+def test_needs_rehash_on_parameter_change():
+    old = PasswordHasher(method=CHEAP).hash("pw")
+    assert not PasswordHasher(method=CHEAP).needs_rehash(old)
+    assert PasswordHasher(method="pbkdf2:sha256:2000").needs_rehash(old)
+
+@pytest.mark.parametrize("method", ["scrypt", "pbkdf2", "pbkdf2:sha256"])
+def test_short_method_names_do_not_rehash_forever(method):
+    hasher = PasswordHasher(method=method)
+    assert not hasher.needs_rehash(hasher.hash("pw"))
+    assert hasher.method.count(":") >= 2
+
+def test_full_queue_is_rejected():
+    hasher = PasswordHasher(method=CHEAP, max_workers=1, max_queue=0)
+    release = threading.Event()
+    blocker = hasher._submit(release.wait)
+    with pytest.raises(HasherBusy):
+        hasher.hash("pw")
+    release.set()
+    blocker.result()
+    assert hasher.hash("pw")
+    assert hasher.stats()["rejected"] == 1
+
+def test_admissions_leave_a_request_thread_free():
+    hasher = PasswordHasher(method=CHEAP, max_workers=2, max_queue=32, request_threads=3)
+    assert hasher.max_in_flight == 2
+    release = threading.Event()
+    waiting = [threading.Thread(target=lambda: hasher._submit(release.wait).result()) for _ in range(2)]
+    for thread in waiting:
+        thread.start()
+    while hasher.stats()["running"] < 2:
+        release.wait(0.01)
+
+    with pytest.raises(HasherBusy):
+        hasher.hash("pw")
+    release.set()
+    for thread in waiting:
+        thread.join()
+    assert hasher.hash("pw")
+
+def test_busy_hasher_returns_503(client, fake_users, monkeypatch):
+    def busy(*args, **kwargs):
+        raise HasherBusy()
+    monkeypatch.setattr(app_module.hasher, "hash", busy)
+    response = client.post('/register', data={'username': 'robin', 'password': 'pw'})
+    assert response.status_code == 503
+    assert b"Server is busy" in response.data
+    assert not fake_users.docs
+
+def test_login_upgrades_old_hash(client, fake_users, monkeypatch):
+    monkeypatch.setattr(app_module.hasher, "method", CHEAP)
+    client.post('/register', data={'username': 'robin', 'password': 'pw'})
+    monkeypatch.setattr(app_module.hasher, "method", "pbkdf2:sha256:2000")
+
+    response = client.post('/login', data={'username': 'robin', 'password': 'pw'})
+    assert response.status_code == 302
+    assert fake_users.updated.wait(5)
+    assert fake_users.docs['robin']['password'].startswith("pbkdf2:sha256:2000$")
+
+    client.get('/logout')
+    assert client.post('/login', data={'username': 'robin', 'password': 'pw'}).status_code == 302
@@ -0,0 +1,80 @@
+import sys
+import os
+from types import SimpleNamespace
+from bson.objectid import ObjectId
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import app as app_module
+from app import app
+from profile_cache import ProfileCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+def test_cache_hit_requires_all_fields():
+    cache = ProfileCache()
+    cache.put("u1", {"money": 5})
+    assert cache.get("u1", ("money",)) == {"money": 5}
+    assert cache.get("u1", ("money", "birds")) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_cache_entries_expire():
+    clock = FakeClock()
+    cache = ProfileCache(ttl=10, clock=clock)
+    cache.put("u1", {"money": 5})
+    clock.now = 10
+    assert cache.get("u1", ("money",)) is None
+    assert len(cache) == 0
+
+def test_cache_evicts_least_recently_used():
+    cache = ProfileCache(max_entries=2)
+    cache.put("u1", {"money": 1})
+    cache.put("u2", {"money": 2})
+    cache.get("u1", ("money",))
+    cache.put("u3", {"money": 3})
+    assert cache.get("u2", ("money",)) is None
+    assert cache.get("u1", ("money",)) == {"money": 1}
+
+def test_cache_invalidate():
+    cache = ProfileCache()
+    cache.put("u1", {"money": 1})
+    cache.invalidate("u1")
+    assert cache.get("u1", ("money",)) is None
+
+def test_dashboard_uses_cache_and_projection(monkeypatch):
+    user_id = ObjectId()
+    calls = []
+
+    class FakeUsers:
+        def find_one(self, query, projection):
+            calls.append(projection)
+            return {"_id": user_id, "money": 42}
+
+    monkeypatch.setattr(app_module, "mongo", SimpleNamespace(db=SimpleNamespace(users=FakeUsers())))
+    monkeypatch.setattr(app_module.users, "cache", ProfileCache())
+
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        with client.session_transaction() as sess:
+            sess['user_id'] = str(user_id)
+        assert client.get('/dashboard').status_code == 200
+        assert client.get('/dashboard').status_code == 200
+
+    assert calls == [{"money": 1}]
+
+def test_dashboard_with_deleted_user_logs_out(monkeypatch):
+    users = SimpleNamespace(find_one=lambda query, projection: None)
+    monkeypatch.setattr(app_module, "mongo", SimpleNamespace(db=SimpleNamespace(users=users)))
+    monkeypatch.setattr(app_module.users, "cache", ProfileCache())
+
+    with app.test_client() as client:
+        with client.session_transaction() as sess:
+            sess['user_id'] = str(ObjectId())
+        response = client.get('/dashboard')
+
+    assert response.status_code == 302
+    assert '/login' in response.headers['Location']
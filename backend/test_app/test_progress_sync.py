@@ -0,0 +1,283 @@
+import pytest
+import sys
+import os
+import copy
+import time
+from types import SimpleNamespace
+from bson.objectid import ObjectId
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import app as app_module
+from app import app
+from profile_cache import ProfileCache
+
+USER_ID = ObjectId()
+
+def evaluate(expr, doc, variables=None):
+    """The aggregation operators the update pipelines in models use, on plain dicts"""
+    variables = variables or {}
+    if isinstance(expr, str) and expr.startswith("$"):
+        name, *path = expr.lstrip("$").split(".")
+        value = variables.get(name) if expr.startswith("$$") else doc.get(name)
+        for part in path:
+            if isinstance(value, list):  # "$birds.name" collects the field from every element
+                value = [item.get(part) for item in value if isinstance(item, dict)]
+            else:
+                value = value.get(part) if isinstance(value, dict) else None
+        return value
+    if isinstance(expr, list):
+        return [evaluate(e, doc, variables) for e in expr]
+    if not isinstance(expr, dict):
+        return expr
+    if not next(iter(expr)).startswith("$"):
+        return {key: evaluate(value, doc, variables) for key, value in expr.items()}
+    (op, args), = expr.items()
+    if op == "$literal":
+        return args
+    if op == "$cond":
+        test, then, otherwise = args
+        return evaluate(then if evaluate(test, doc, variables) else otherwise, doc, variables)
+    if op == "$filter":
+        items = evaluate(args["input"], doc, variables)
+        return [item for item in items if evaluate(args["cond"], doc, {**variables, args["as"]: item})]
+    values = evaluate(args, doc, variables)
+    if op in ("$min", "$max"):
+        values = [v for v in values if v is not None]
+        return (min if op == "$min" else max)(values) if values else None
+    if op == "$type":
+        return "missing" if values is None else type(values).__name__
+    if op == "$ifNull":
+        return values[1] if values[0] is None else values[0]
+    if op == "$arrayElemAt":
+        array, index = values
+        return array[index] if -len(array) <= index < len(array) else None
+    if op == "$slice":
+        array, n = values
+        return array[n:] if n < 0 else array[:n]
+    if op in ("$gt", "$lt", "$gte"):
+        if None in values:  # null sorts below every number
+            return values[0] is not None if op == "$gt" else False
+    return {
+        "$add": sum, "$and": all, "$or": any,
+        "$not": lambda v: not v[0],
+        "$size": len,
+        "$sum": lambda v: sum(x for x in v if isinstance(x, (int, float))),
+        "$in": lambda v: v[0] in v[1],
+        "$subtract": lambda v: None if None in v else v[0] - v[1],
+        "$multiply": lambda v: v[0] * v[1],
+        "$eq": lambda v: v[0] == v[1],
+        "$ne": lambda v: v[0] != v[1],
+        "$gt": lambda v: v[0] > v[1],
+        "$gte": lambda v: v[0] >= v[1],
+        "$lt": lambda v: v[0] < v[1],
+        "$concatArrays": lambda v: [item for array in v for item in array],
+    }[op](values)
+
+def run_pipeline(doc, pipeline):
+    """Apply an update pipeline of $set/$unset stages to doc in place"""
+    for stage in pipeline:
+        if "$unset" in stage:
+            for field in stage["$unset"]:
+                doc.pop(field, None)
+        else:
+            doc.update({field: evaluate(expr, doc) for field, expr in stage["$set"].items()})
+
+class FakeUsers:
+    """Just enough of a users collection to run the sync pipeline"""
+    def __init__(self):
+        self.doc = {"_id": USER_ID, "money": 0, "birds": [], "income_rate": 10}
+        self.updates = []
+
+    def find_one(self, query, projection):
+        raise AssertionError("sync must not read before it writes")
+
+    def find_one_and_update(self, query, pipeline, projection=None, return_document=None):
+        self.updates.append((query, pipeline))
+        if query["_id"] != self.doc["_id"]:
+            return None
+        before = copy.deepcopy(self.doc)
+        if projection is not None:
+            session = projection["sync_sessions"]["$elemMatch"]["id"]
+            before["sync_sessions"] = [s for s in before.get("sync_sessions", []) if s["id"] == session][:1]
+        run_pipeline(self.doc, pipeline)
+        return before
+
+    def bulk_write(self, operations, ordered=True):
+        matched = sum(self.find_one_and_update(op._filter, op._doc) is not None for op in operations)
+        return SimpleNamespace(matched_count=matched)
+
+@pytest.fixture
+def users(monkeypatch):
+    fake = FakeUsers()
+    monkeypatch.setattr(app_module, "mongo", SimpleNamespace(db=SimpleNamespace(users=fake)))
+    monkeypatch.setattr(app_module.users, "cache", ProfileCache())
+    return fake
+
+@pytest.fixture
+def client():
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        with client.session_transaction() as sess:
+            sess['user_id'] = str(USER_ID)
+        yield client
+
+def test_sync_requires_login():
+    with app.test_client() as anonymous:
+        response = anonymous.post('/sync-progress', json={"session": "tab-a", "seq": 1, "events": []})
+    assert response.status_code == 401
+
+def test_sync_applies_batch_in_one_write(client, users):
+    response = client.post('/sync-progress', json={"session": "tab-a", "seq": 1, "events": [
+        {"type": "collect", "bird": {"name": "Duckling", "rarity": "common", "gold_per_minute": 0.6}},
+        {"type": "gold", "amount": 10},
+        {"type": "gold", "amount": 2.5},
+    ]})
+
+    assert response.get_json() == {"success": True, "applied": True, "session": "tab-a", "seq": 1}
+    assert len(users.updates) == 1
+    assert users.doc["money"] == 12.5
+    assert users.doc["income_rate"] == 10.6
+    assert [b["name"] for b in users.doc["birds"]] == ["Duckling"]
+
+def test_sync_retry_is_idempotent(client, users):
+    batch = {"session": "tab-a", "seq": 3, "events": [{"type": "gold", "amount": 5}]}
+    client.post('/sync-progress', json=batch)
+    response = client.post('/sync-progress', json=batch)
+
+    assert response.get_json()["applied"] is False
+    assert users.doc["money"] == 5
+
+def test_sync_after_reload_starts_a_new_session(client, users):
+    for seq in (1, 2, 3):
+        client.post('/sync-progress', json={"session": "load-1", "seq": seq, "events": [{"type": "gold", "amount": 1}]})
+
+    # The reloaded page counts from 1 again, and a second tab has its own counter
+    reloaded = client.post('/sync-progress', json={"session": "load-2", "seq": 1, "events": [{"type": "gold", "amount": 10}]})
+    other_tab = client.post('/sync-progress', json={"session": "load-3", "seq": 1, "events": [{"type": "gold", "amount": 100}]})
+    retry = client.post('/sync-progress', json={"session": "load-2", "seq": 1, "events": [{"type": "gold", "amount": 10}]})
+
+    assert reloaded.get_json()["applied"] is True
+    assert other_tab.get_json()["applied"] is True
+    assert retry.get_json()["applied"] is False
+    assert users.doc["money"] == 113
+    assert [(entry["id"], entry["seqs"]) for entry in users.doc["sync_sessions"]] == [
+        ("load-1", [1, 2, 3]), ("load-3", [1]), ("load-2", [1])]
+
+def test_sync_batches_may_arrive_out_of_order(client, users):
+    def send(seq, amount):
+        return client.post('/sync-progress', json={"session": "tab-a", "seq": seq, "events": [{"type": "gold", "amount": amount}]})
+
+    assert send(2, 20).get_json()["applied"] is True
+    assert send(1, 1).get_json()["applied"] is True
+    assert send(2, 20).get_json()["applied"] is False
+    assert send(3, 300).get_json()["applied"] is True
+    assert users.doc["money"] == 321
+    assert users.doc["sync_sessions"][0]["seqs"] == [2, 1, 3]
+
+def test_sync_state_is_bounded(client, users):
+    from models import MAX_SYNC_SEQS, MAX_SYNC_SESSIONS
+    for load in range(MAX_SYNC_SESSIONS + 3):
+        client.post('/sync-progress', json={"session": f"load-{load}", "seq": 1, "events": []})
+    for seq in range(1, MAX_SYNC_SEQS + 6):
+        client.post('/sync-progress', json={"session": "long", "seq": seq, "events": [{"type": "gold", "amount": 1}]})
+
+    sessions = users.doc["sync_sessions"]
+    assert len(sessions) == MAX_SYNC_SESSIONS
+    assert sessions[-1]["id"] == "long"
+    assert sessions[-1]["seqs"] == list(range(6, MAX_SYNC_SEQS + 6))
+    # A batch older than every remembered seq cannot be replayed
+    replay = client.post('/sync-progress', json={"session": "long", "seq": 1, "events": [{"type": "gold", "amount": 1}]})
+    assert replay.get_json()["applied"] is False
+    assert users.doc["money"] == MAX_SYNC_SEQS + 5
+
+def test_sync_pays_at_most_what_the_income_rate_earns(client, users):
+    from models import SYNC_GOLD_SLACK
+    users.doc["income_rate"] = 1
+    greedy = client.post('/sync-progress', json={"session": "tab-a", "seq": 1, "events": [{"type": "gold", "amount": 1e12}]})
+    more = client.post('/sync-progress', json={"session": "tab-a", "seq": 2, "events": [{"type": "gold", "amount": 50}]})
+
+    assert greedy.get_json()["applied"] is True
+    assert more.get_json()["applied"] is True
+    # One gold/sec over a session a few milliseconds old, plus SYNC_GOLD_SLACK seconds
+    assert users.doc["money"] == pytest.approx(SYNC_GOLD_SLACK, abs=1)
+    assert users.doc["sync_sessions"][0]["earned"] == users.doc["money"]
+
+@pytest.mark.parametrize("payload", [
+    {"events": []},
+    {"seq": 1, "events": []},
+    {"session": "a.b", "seq": 1, "events": []},
+    {"session": "$where", "seq": 1, "events": []},
+    {"session": "tab-a", "seq": 0, "events": []},
+    {"session": "tab-a", "seq": 1, "events": [{"type": "gold", "amount": "lots"}]},
+    {"session": "tab-a", "seq": 1, "events": [{"type": "gold", "amount": -2.5}]},
+    {"session": "tab-a", "seq": 1, "events": [{"type": "gold", "amount": 1e400}]},
+    {"session": "tab-a", "seq": 1, "events": [{"type": "collect", "bird": {"name": "Roc", "gold_per_minute": 1e9}}]},
+    {"session": "tab-a", "seq": 1, "events": [{"type": "collect", "bird": {"name": "Void", "gold_per_minute": -1}}]},
+    {"session": "tab-a", "seq": 1, "events": [{"type": "collect", "bird": {}}]},
+    {"session": "tab-a", "seq": 1, "events": [{"type": "teleport"}]},
+    [1, 2],
+    "seq",
+    None,
+])
+def test_sync_rejects_bad_batches(client, users, payload):
+    response = client.post('/sync-progress', json=payload)
+    assert response.status_code == 400
+    assert users.updates == []
+
+def test_sync_goes_through_write_behind_buffer(client, users, monkeypatch):
+    monkeypatch.setitem(app.config, "WRITE_BEHIND", True)
+    monkeypatch.setattr(app_module, "progress_buffer", app_module.WriteBehindBuffer(lambda: users))
+
+    response = client.post('/sync-progress', json={"session": "tab-a", "seq": 1, "events": [{"type": "gold", "amount": 4}]})
+
+    assert response.get_json()["buffered"] is True
+    assert users.updates == []
+    assert app_module.progress_buffer.pending() == 1
+
+def test_sync_asks_for_a_retry_when_the_buffer_is_full(client, users, monkeypatch):
+    monkeypatch.setitem(app.config, "WRITE_BEHIND", True)
+    flushed = SimpleNamespace(bulk_write=lambda operations, ordered: SimpleNamespace(matched_count=len(operations)))
+    monkeypatch.setattr(app_module, "progress_buffer", app_module.WriteBehindBuffer(lambda: flushed, max_users=1))
+    app_module.progress_buffer.add("someone-else", money=1)
+    batch = {"session": "tab-a", "seq": 1, "events": [{"type": "gold", "amount": 4}]}
+
+    dropped = client.post('/sync-progress', json=batch)
+    app_module.progress_buffer.flush()
+    retried = client.post('/sync-progress', json=batch)
+
+    assert dropped.status_code == 503
+    assert dropped.get_json()["applied"] is False
+    assert retried.status_code == 200
+    assert retried.get_json()["applied"] is True
+
+def test_sync_credits_time_away_once_per_session(client, users, monkeypatch):
+    away_since = time.time() - 3600
+    users.doc.update(last_seen=away_since, income_rate=0.5)
+    monkeypatch.setitem(app.config, "OFFLINE_MAX_SECONDS", 600)
+
+    first = client.post('/sync-progress', json={"session": "tab-a", "seq": 1, "events": []}).get_json()
+    assert first["offline_credit"] == pytest.approx(300)
+    assert users.doc["last_seen"] > away_since + 3600
+
+    # A running game that syncs rarely earns its own gold for the gap
+    users.doc["last_seen"] -= 1800
+    second = client.post('/sync-progress', json={"session": "tab-a", "seq": 2, "events": []}).get_json()
+    assert "offline_credit" not in second
+    assert users.doc["money"] == pytest.approx(300)
+
+    # The next page load is a new session, so the time since tab-a's last sync is credited
+    users.doc["last_seen"] -= 1800
+    reloaded = client.post('/sync-progress', json={"session": "tab-b", "seq": 1, "events": []}).get_json()
+    assert reloaded["offline_credit"] == pytest.approx(300)
+    assert users.doc["money"] == pytest.approx(600)
+
+def test_write_behind_credits_time_away_on_flush(users):
+    users.doc.update(last_seen=time.time() - 3600, income_rate=0.5)
+    buffer = app_module.WriteBehindBuffer(lambda: users, max_offline=600, min_gap=120)
+    buffer.add(USER_ID, money=4, seq=1, session="tab-a")
+    buffer.add(USER_ID, money=1, seq=2, session="tab-a")
+
+    assert buffer.flush() == 1
+    assert users.doc["money"] == pytest.approx(305)
+    assert users.doc["sync_sessions"][0]["id"] == "tab-a"
@@ -0,0 +1,135 @@
+import sys
+import os
+import pytest
+from types import SimpleNamespace
+from pymongo.errors import AutoReconnect
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from write_buffer import BufferFull, WriteBehindBuffer
+from test_progress_sync import USER_ID, FakeUsers as SyncedUsers, run_pipeline
+
+class FakeUsers:
+    def __init__(self, fail=False, missing=0):
+        self.fail = fail
+        self.missing = missing
+        self.calls = []
+
+    def bulk_write(self, operations, ordered=True):
+        if self.fail:
+            raise AutoReconnect("mongo is down")
+        self.calls.append((operations, ordered))
+        return SimpleNamespace(matched_count=len(operations) - self.missing)
+
+def test_deltas_for_same_user_are_coalesced():
+    users = FakeUsers()
+    buffer = WriteBehindBuffer(lambda: users)
+
+    buffer.add("u1", money=5, seq=1, session="tab")
+    buffer.add("u1", money=2.5, birds=[{"name": "Crow", "gold_per_minute": 3}], seq=2, session="tab")
+    buffer.add("u2", money=1)
+
+    assert buffer.flush() == 2
+    operations, ordered = users.calls[0]
+    assert ordered is False
+    doc = {}
+    run_pipeline(doc, operations[0]._doc)
+    assert doc["money"] == 7.5
+    assert doc["income_rate"] == 3
+    assert doc["birds"] == [{"name": "Crow", "gold_per_minute": 3}]
+    assert doc["sync_sessions"][0]["seqs"] == [1, 2]
+    assert doc["last_seen"] > 0
+    assert operations[1]._doc == {"$inc": {"money": 1}, "$max": {"last_seen": operations[1]._doc["$max"]["last_seen"]}}
+    assert buffer.stats()["flushed_ops"] == 2
+    assert buffer.pending() == 0
+
+def test_duplicate_seq_is_ignored_while_pending():
+    buffer = WriteBehindBuffer(lambda: FakeUsers())
+    assert buffer.add("u1", money=5, seq=4, session="tab")
+    assert not buffer.add("u1", money=5, seq=4, session="tab")
+    assert buffer.add("u1", money=5, seq=3, session="tab")
+
+def test_workers_may_flush_a_session_out_of_order():
+    users = SyncedUsers()
+    worker_a = WriteBehindBuffer(lambda: users)
+    worker_b = WriteBehindBuffer(lambda: users)
+    worker_a.add(USER_ID, money=1, seq=1, session="tab")
+    worker_b.add(USER_ID, money=10, seq=2, session="tab")
+    worker_a.add(USER_ID, money=100, seq=3, session="tab")
+    worker_b.add(USER_ID, money=10, seq=2, session="tab")
+
+    worker_b.flush()
+    worker_a.flush()
+    # A retry of seq 2 that lands on the other worker after both flushes
+    worker_a.add(USER_ID, money=10, seq=2, session="tab")
+    worker_a.flush()
+
+    assert users.doc["money"] == 111
+    assert users.doc["sync_sessions"][0]["seqs"] == [2, 1, 3]
+
+def test_unmatched_users_are_counted():
+    buffer = WriteBehindBuffer(lambda: FakeUsers(missing=1))
+    buffer.add("u1", money=1)
+    buffer.add("deleted", money=1)
+
+    assert buffer.flush() == 2
+    assert buffer.stats()["unmatched_ops"] == 1
+
+def test_sessions_are_guarded_separately():
+    users = FakeUsers()
+    flushed = []
+    buffer = WriteBehindBuffer(lambda: users, on_flush=flushed.extend)
+    assert buffer.add("u1", money=5, seq=4, session="old-load")
+    assert buffer.add("u1", money=1, seq=1, session="new-load")
+
+    assert buffer.flush() == 2
+    doc = {}
+    for op in users.calls[0][0]:
+        run_pipeline(doc, op._doc)
+    assert [(entry["id"], entry["seqs"]) for entry in doc["sync_sessions"]] == [("old-load", [4]), ("new-load", [1])]
+    assert flushed == ["u1"]
+
+def test_full_buffer_drops_new_users():
+    buffer = WriteBehindBuffer(lambda: FakeUsers(), max_users=1)
+    assert buffer.add("u1", money=1)
+    assert buffer.add("u1", money=1)
+    with pytest.raises(BufferFull):
+        buffer.add("u2", money=1)
+    assert buffer.stats()["dropped_ops"] == 1
+
+def test_dropped_batch_is_accepted_on_retry():
+    users = FakeUsers()
+    buffer = WriteBehindBuffer(lambda: users, max_users=1)
+    buffer.add("u1", money=1)
+    with pytest.raises(BufferFull):
+        buffer.add("u2", money=5, seq=1, session="tab")
+
+    buffer.flush()
+    assert buffer.add("u2", money=5, seq=1, session="tab")
+    assert not buffer.add("u2", money=5, seq=1, session="tab")
+
+def test_failed_flush_keeps_deltas():
+    users = FakeUsers(fail=True)
+    buffer = WriteBehindBuffer(lambda: users)
+    buffer.add("u1", money=3)
+
+    assert buffer.flush() == 0
+    assert buffer.pending() == 1
+
+    users.fail = False
+    buffer.add("u1", money=2)
+    buffer.stop()
+    assert users.calls[0][0][0]._doc["$inc"] == {"money": 5}
+
+def test_background_flush_on_threshold():
+    users = FakeUsers()
+    buffer = WriteBehindBuffer(lambda: users, flush_threshold=2, flush_interval=60)
+    buffer.start()
+    buffer.add("u1", money=1)
+    buffer.add("u2", money=1)
+    for _ in range(100):
+        if users.calls:
+            break
+        buffer._stopping.wait(0.01)
+    buffer.stop()
+    assert sum(len(ops) for ops, _ in users.calls) == 2
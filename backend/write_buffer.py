@@ -0,0 +1,188 @@
+"""
+Write-behind buffer for per-user progress deltas.
+
+Each gunicorn worker keeps its own buffer. Batches for the same user and
+client session are collected in memory and written to MongoDB as one update
+per session in an unordered bulk_write, either on a timer or once enough users
+are pending. Every batch keeps its seq, and the database applies only the seqs
+it has not seen, so workers may flush the same session in any order. Time away
+is credited up to when the first batch of a session arrived, not when it is
+flushed.
+"""
+
+import logging
+import threading
+import time
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from models import income_rate_delta, progress_update
+
+logger = logging.getLogger(__name__)
+
+
+class BufferFull(Exception):
+    """Raised by add() when max_users deltas are already pending; the client should retry later."""
+
+
+class WriteBehindBuffer:
+    def __init__(self, get_collection, max_users=10000, flush_threshold=500, flush_interval=2.0, on_flush=None,
+                 max_offline=0, min_gap=0):
+        self.get_collection = get_collection
+        self.on_flush = on_flush
+        self.max_offline = max_offline
+        self.min_gap = min_gap
+        self.max_users = max_users
+        self.flush_threshold = flush_threshold
+        self.flush_interval = flush_interval
+
+        self.flushed_ops = 0
+        self.dropped_ops = 0
+        self.unmatched_ops = 0
+        self.failed_flushes = 0
+
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def add(self, user_id, money=0, birds=(), seq=None, session=None):
+        """
+        Queue a delta for user_id. seq, when given, numbers the batches of one
+        client session. Returns False if that batch is already pending here and
+        raises BufferFull if the delta could not be queued. Batches this buffer
+        has already flushed are recognised by the database instead.
+        """
+        key = (user_id, session)
+        with self._lock:
+            entry = self._pending.get(key)
+            if seq is not None and entry is not None and seq in entry["batches"]:
+                return False
+
+            if entry is None:
+                if len(self._pending) >= self.max_users:
+                    self.dropped_ops += 1
+                    self._wake.set()
+                    raise BufferFull("write-behind buffer is full")
+                now = time.time()
+                entry = self._pending[key] = {"money": 0, "birds": [], "batches": {}, "started": now, "seen": now}
+            entry["seen"] = time.time()
+            if seq is not None:
+                entry["batches"][seq] = (money, list(birds))
+            else:
+                entry["money"] += money
+                entry["birds"].extend(birds)
+
+            if len(self._pending) >= self.flush_threshold:
+                self._wake.set()
+        return True
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self):
+        return {
+            "pending": self.pending(),
+            "flushed_ops": self.flushed_ops,
+            "dropped_ops": self.dropped_ops,
+            "unmatched_ops": self.unmatched_ops,
+            "failed_flushes": self.failed_flushes,
+        }
+
+    def flush(self):
+        """Write every pending delta in one bulk_write. Returns the number of ops sent."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        operations = [self._to_operation(key, entry) for key, entry in batch.items()]
+        operations = [op for op in operations if op is not None]
+        if not operations:
+            return 0
+
+        try:
+            result = self.get_collection().bulk_write(operations, ordered=False)
+        except PyMongoError as e:
+            logger.warning("write-behind flush failed: %s", e)
+            self._requeue(batch)
+            return 0
+
+        self.flushed_ops += len(operations)
+        unmatched = len(operations) - result.matched_count
+        if unmatched:
+            # Users deleted since their batches were queued; those deltas are gone
+            self.unmatched_ops += unmatched
+            logger.warning("write-behind flush matched %d of %d users", result.matched_count, len(operations))
+        if self.on_flush is not None:
+            self.on_flush(list(dict.fromkeys(user_id for user_id, _ in batch)))
+        return len(operations)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flusher thread and write out whatever is still pending."""
+        if self._thread is not None:
+            self._stopping.set()
+            self._wake.set()
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _requeue(self, batch):
+        self.failed_flushes += 1
+        with self._lock:
+            for key, entry in batch.items():
+                current = self._pending.get(key)
+                if current is None:
+                    if len(self._pending) >= self.max_users:
+                        self.dropped_ops += 1
+                        continue
+                    self._pending[key] = entry
+                else:
+                    current["money"] += entry["money"]
+                    current["birds"][:0] = entry["birds"]
+                    for seq, delta in entry["batches"].items():
+                        current["batches"].setdefault(seq, delta)
+                    current["started"] = min(current["started"], entry["started"])
+                    current["seen"] = max(current["seen"], entry["seen"])
+
+    def _to_operation(self, key, entry):
+        user_id, session = key
+        if entry["batches"]:
+            batches = [(seq, money, birds) for seq, (money, birds) in sorted(entry["batches"].items())]
+            return UpdateOne(
+                {"_id": user_id},
+                progress_update(session, batches, now=entry["started"], seen=entry["seen"],
+                                max_offline=self.max_offline, min_gap=self.min_gap),
+            )
+
+        update = {}
+        inc = {}
+        if entry["money"]:
+            inc["money"] = entry["money"]
+        if entry["birds"]:
+            update["$push"] = {"birds": {"$each": entry["birds"]}}
+            rate = income_rate_delta(entry["birds"])
+            if rate:
+                inc["income_rate"] = rate
+        if inc:
+            update["$inc"] = inc
+        if not update:
+            return None
+        update["$max"] = {"last_seen": entry["seen"]}
+        return UpdateOne({"_id": user_id}, update)
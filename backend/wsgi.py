@@ -1,4 +1,6 @@
-from app import app
+from app import app, ensure_indexes
+
+ensure_indexes()
 
 if __name__ == "__main__":
-    app.run(port=5001)
\ No newline at end of file
+    app.run(port=5001)